@@ -0,0 +1,265 @@
+"""
+MazeBatch generates many mazes at once, or one large maze in tiles,
+across worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Lock, shared_memory
+import os
+
+from MazeGenerators import (Maze, WallPlane, ALGORITHMS, plane_bytes,
+							maze_seed, SOUTH, EAST)
+from MazeTiles import plan_stitches
+
+tile_lock = None # Guards the shared walls in tile workers; see set_tile_lock.
+
+def maze_bytes(size):
+	"""Return the number of bytes both wall planes of a maze take up."""
+	return 2 * plane_bytes(size + 1, size)
+
+def maze_from_buffer(size, buffer):
+	"""
+	Build a Maze from wall planes packed one after the other.
+
+	Args:
+		size (int) -- The side length of the maze.
+		buffer (bytes-like) -- The slab plane followed by the column
+		plane, as written by generate_range.
+
+	Returns:
+		Maze that owns a copy of the walls.
+	"""
+	length = plane_bytes(size + 1, size)
+
+	def fill(maze):
+		maze.slabs = WallPlane(size + 1, size,
+							   bits=bytearray(buffer[:length]))
+		maze.columns = WallPlane(size + 1, size,
+								 bits=bytearray(buffer[length:2*length]))
+
+	return Maze(size, fill)
+
+def generate_range(block_name, algorithm, size, base_seed, start, stop,
+				   options):
+	"""
+	Generate mazes start up to stop of a batch into shared memory.
+
+	This runs in the worker processes. Each maze gets its own seeded
+	generator, so the result does not depend on which worker runs it.
+
+	Args:
+		block_name (str) -- Name of the SharedMemory block.
+		algorithm (str) -- Key of the algorithm in ALGORITHMS.
+		size (int) -- The side length of every maze.
+		base_seed (int) -- The seed of the whole batch.
+		start (int) -- Index of the first maze to generate.
+		stop (int) -- Index one past the last maze to generate.
+		options (dict) -- Extra keyword arguments for generate().
+	"""
+	generator = ALGORITHMS[algorithm]
+	stride = maze_bytes(size)
+	length = stride // 2
+	block = shared_memory.SharedMemory(name=block_name)
+	try:
+		buffer = block.buf
+		for index in range(start, stop):
+			maze = generator.generate(Maze(size),
+									  seed=maze_seed(base_seed, index),
+									  **options)
+			offset = index * stride
+			buffer[offset:offset+length] = maze.slabs.bits
+			buffer[offset+length:offset+stride] = maze.columns.bits
+		del buffer
+	finally:
+		block.close()
+
+def generate_batch(algorithm, size, count, base_seed=0, workers=None,
+				   **options):
+	"""
+	Generate count mazes in parallel.
+
+	The workers write their walls straight into one shared memory
+	block, so only the batch parameters are pickled between processes.
+	The same arguments always produce the same mazes, whatever the
+	number of workers.
+
+	Args:
+		algorithm (str) -- Key of the algorithm in ALGORITHMS.
+		size (int) -- The side length of every maze.
+		count (int) -- The number of mazes to generate.
+		base_seed (int) -- The non-negative seed of the batch
+		(default: 0).
+		workers (int) -- The number of processes (default: one per CPU).
+		options -- Extra keyword arguments for the algorithm's
+		generate(), e.g. frontier=True for Prim's.
+
+	Returns:
+		list of count Mazes.
+	"""
+	if algorithm not in ALGORITHMS:
+		raise KeyError("Algorithm: " + str(algorithm) + " not recognized.")
+	if base_seed < 0:
+		raise ValueError("base_seed must not be negative")
+	if count <= 0:
+		return []
+
+	workers = workers or os.cpu_count() or 1
+	stride = maze_bytes(size)
+	# A few chunks per worker keeps them busy without a task per maze.
+	chunk = max(1, count // (workers * 4))
+
+	block = shared_memory.SharedMemory(create=True, size=max(1, stride * count))
+	try:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			futures = [pool.submit(generate_range, block.name, algorithm,
+								   size, base_seed, start,
+								   min(start + chunk, count), options)
+					   for start in range(0, count, chunk)]
+			for future in futures:
+				future.result()
+
+		buffer = block.buf
+		mazes = [maze_from_buffer(size, buffer[i*stride:(i+1)*stride])
+				 for i in range(count)]
+		del buffer
+		for index, maze in enumerate(mazes):
+			maze.algorithm = ALGORITHMS[algorithm].__name__
+			maze.seed = maze_seed(base_seed, index)
+	finally:
+		block.close()
+		block.unlink()
+
+	return mazes
+
+def set_tile_lock(lock):
+	"""Hand the tile workers their shared lock when they start."""
+	global tile_lock
+	tile_lock = lock
+
+def generate_tiles(block_name, algorithm, size, tile_size, base_seed, start,
+				   stop, options):
+	"""
+	Generate tiles start up to stop of a maze into its shared walls.
+
+	This runs in the worker processes. Each tile is generated on its
+	own, then its inner walls are copied row by row into the shared
+	wall planes. Tiles next to each other can share a byte of a plane,
+	so the copying is done holding tile_lock.
+
+	Args:
+		block_name (str) -- Name of the SharedMemory block holding the
+		slab plane followed by the column plane.
+		algorithm (str) -- Key of the algorithm in ALGORITHMS.
+		size (int) -- The side length of the whole maze.
+		tile_size (int) -- The side length of each tile.
+		base_seed (int) -- The seed of the whole maze.
+		start (int) -- Index of the first tile, ty * tiles + tx.
+		stop (int) -- Index one past the last tile.
+		options (dict) -- Extra keyword arguments for generate().
+	"""
+	generator = ALGORITHMS[algorithm]
+	tiles = size // tile_size
+	length = plane_bytes(size + 1, size)
+	block = shared_memory.SharedMemory(name=block_name)
+	try:
+		buffer = block.buf
+		slabs = WallPlane(size + 1, size, bits=buffer[:length])
+		columns = WallPlane(size + 1, size, bits=buffer[length:2*length])
+
+		for index in range(start, stop):
+			ty, tx = divmod(index, tiles)
+			tile = generator.generate(Maze(tile_size),
+									  seed=maze_seed(base_seed, index),
+									  **options)
+			left = tx * tile_size
+			top = ty * tile_size
+
+			with tile_lock:
+				for i in range(1, tile_size):
+					slabs.write_bits((top + i) * size + left, tile_size,
+									 tile.slabs.read_bits(i * tile_size,
+														  tile_size))
+					columns.write_bits((left + i) * size + top, tile_size,
+									   tile.columns.read_bits(i * tile_size,
+															  tile_size))
+
+		del slabs, columns, buffer
+	finally:
+		block.close()
+
+def generate_tiled(algorithm, size, tiles, seed=0, workers=None, **options):
+	"""
+	Generate one large maze as tiles x tiles tiles in parallel.
+
+	Every tile is generated by a worker straight into one shared memory
+	copy of the maze's walls, and then one door is opened per edge of a
+	random spanning tree over the tiles, so the maze is perfect. It is
+	the same maze as a TiledMaze with the same parameters.
+
+	Args:
+		algorithm (str) -- Key of the algorithm in ALGORITHMS.
+		size (int) -- The side length of the maze; a positive multiple
+		of tiles.
+		tiles (int) -- The number of tiles along each side.
+		seed (int) -- The non-negative seed of the maze (default: 0).
+		workers (int) -- The number of processes (default: one per CPU).
+		options -- Extra keyword arguments for the algorithm's
+		generate().
+
+	Returns:
+		The finished Maze.
+	"""
+	if algorithm not in ALGORITHMS:
+		raise KeyError("Algorithm: " + str(algorithm) + " not recognized.")
+	if size <= 0 or tiles <= 0 or size % tiles:
+		raise ValueError("size must be a positive multiple of tiles")
+	if seed < 0:
+		raise ValueError("seed must not be negative")
+
+	tile_size = size // tiles
+	count = tiles * tiles
+	workers = workers or os.cpu_count() or 1
+	chunk = max(1, count // (workers * 4))
+	length = plane_bytes(size + 1, size)
+
+	block = shared_memory.SharedMemory(create=True, size=2 * length)
+	try:
+		# Start both planes as all walls, written straight into the block.
+		buffer = block.buf
+		for start in (0, length):
+			WallPlane(size + 1, size, value=True,
+					  bits=buffer[start:start + length])
+		del buffer
+
+		with ProcessPoolExecutor(max_workers=workers,
+								 initializer=set_tile_lock,
+								 initargs=(Lock(),)) as pool:
+			futures = [pool.submit(generate_tiles, block.name, algorithm, size,
+								   tile_size, seed, start,
+								   min(start + chunk, count), options)
+					   for start in range(0, count, chunk)]
+			for future in futures:
+				future.result()
+
+		buffer = block.buf
+		maze = maze_from_buffer(size, buffer[:2*length])
+		del buffer
+	finally:
+		block.close()
+		block.unlink()
+
+	maze.algorithm = ALGORITHMS[algorithm].__name__
+	maze.seed = seed
+
+	# Stitch: the same plan TiledMaze uses, in cells of the whole maze.
+	links, doors = plan_stitches(tiles, tile_size, maze_seed(seed, count))
+	last = tile_size - 1
+	for index in range(count):
+		ty, tx = divmod(index, tiles)
+		corner = ty * tile_size * size + tx * tile_size
+		if links[index] >> EAST & 1:
+			maze.set_wall(corner + doors[2*index] * size + last, EAST, False)
+		if links[index] >> SOUTH & 1:
+			maze.set_wall(corner + last * size + doors[2*index + 1], SOUTH,
+						  False)
+
+	return maze
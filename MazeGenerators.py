@@ -1,19 +1,364 @@
 """MazeGenerators package contains all things for making Mazes."""
-from random import choice, random
+from array import array
+from io import StringIO
+from mmap import mmap as MemoryMap, ACCESS_COPY
+import os
+from random import Random
+import re
+import struct
+
+np = None # numpy is optional; see optional_numpy().
+
+# Directions are small ints so that they can index the tables below.
+NORTH, SOUTH, WEST, EAST = 0, 1, 2, 3
+DIRECTION_LETTERS = 'NSWE'
+DIRECTION_INDEX = {'N': NORTH, 'S': SOUTH, 'W': WEST, 'E': EAST}
+OPPOSITE = (SOUTH, NORTH, EAST, WEST)
+DX = (0, 0, -1, 1)
+DY = (-1, 1, 0, 0)
+
+# Binary maze files: a fixed header, the algorithm name, padding up to a
+# multiple of 8 bytes, then the slab plane and the column plane.
+MAZE_FILE_MAGIC = b'MAZE'
+MAZE_FILE_VERSION = 1
+MAZE_FILE_HEADER = struct.Struct('<4sHHHQQ') # magic, version, flags,
+											 # name length, size, seed.
+MAZE_FILE_HAS_SEED = 1
+MAZE_FILE_SEED_LIMIT = 2**64 # Saved seeds must be in range(this).
+
+WALL_RUN = re.compile('1+')
+
+def optional_numpy():
+	"""
+	Import numpy the first time it is needed. It is slow to import and
+	only bulk generation uses it, so it is left out of start up.
+
+	Returns:
+		The numpy module, or None if it is not installed.
+	"""
+	global np
+	if np is None:
+		try:
+			import numpy
+		except ImportError:
+			numpy = False
+		np = numpy
+	return np or None
+
+def maze_seed(base_seed, index):
+	"""
+	Derive the seed of one maze in a series of mazes.
+
+	Args:
+		base_seed (int) -- The non-negative seed of the whole series.
+		index (int) -- The position of the maze in the series.
+
+	Returns:
+		int that is distinct for every (base_seed, index) pair.
+	"""
+	return base_seed * 2**32 + index
+
+def bit_string(value, count):
+	"""
+	Spell out the low count bits of value, lowest bit first.
+
+	Returns:
+		str of count '0' and '1' characters.
+	"""
+	if count == 0:
+		return ''
+	return format(value, '0' + str(count) + 'b')[::-1]
+
+def plane_bytes(rows, length):
+	"""Return the number of bytes a WallPlane of rows x length needs."""
+	return (rows * length + 7) // 8
+
+class WallPlane:
+	"""
+	A grid of walls stored as one bit per wall.
+
+	Implementation Description:
+		The walls are laid out row after row in a flat bytearray, so
+		the wall at (row, index) lives at bit row * length + index,
+		least significant bit first. Indexing a WallPlane returns a
+		WallRow, which lets a plane be used like the nested lists of
+		bools that it replaces. version counts the writes made through
+		the plane's methods, so that values derived from the walls
+		(like Maze.passage_mask) can tell when they are out of date;
+		code that writes to bits directly must call touch() after.
+	"""
+
+	fill_chunk = 1 << 16 # The most bytes set_range writes in one slice.
+
+	def __init__(self, rows, length, value=False, bits=None):
+		"""
+		Initialize WallPlane.
+
+		Args:
+			rows (int) -- The number of rows of walls.
+			length (int) -- The number of walls in each row.
+			value (bool) -- The starting value of every wall
+			(default: False).
+			bits (bytearray) -- An existing buffer of packed walls to
+			use instead of allocating a new one (default: None).
+		"""
+		self.rows = rows
+		self.length = length
+		if bits is None:
+			bits = bytearray(plane_bytes(rows, length))
+		elif len(bits) != plane_bytes(rows, length):
+			raise ValueError("WallPlane buffer is the wrong size")
+		self.bits = bits
+		self.version = 0
+
+		if value:
+			self.fill(True)
+
+	def __len__(self):
+		"""Return the number of rows in the plane."""
+		return self.rows
+
+	def __getitem__(self, row):
+		"""
+		Return a view of one row of the plane.
+
+		Args:
+			row (int) -- Index of the row, negative indices allowed.
+
+		Returns:
+			WallRow that reads and writes through to the plane.
+		"""
+		return WallRow(self, self.check_row(row))
+
+	def __setitem__(self, row, values):
+		"""
+		Overwrite a whole row of the plane.
+
+		Args:
+			row (int) -- Index of the row, negative indices allowed.
+			values (bool or iterable of bools) -- Either one value for
+			every wall in the row, or a value for each wall.
+
+		Raises:
+			ValueError if values does not hold exactly one value per
+			wall, in which case the row is left unchanged.
+		"""
+		row = self.check_row(row)
+		if values is True or values is False:
+			self.fill_row(row, values)
+			return
+		values = list(values)
+		if len(values) != self.length:
+			raise ValueError("Row of " + str(self.length)
+							 + " walls given " + str(len(values)) + " values")
+		for index, value in enumerate(values):
+			self.set(row, index, value)
+
+	def check_row(self, row):
+		"""Return row as a non-negative index or raise IndexError."""
+		if row < 0:
+			row += self.rows
+		if not 0 <= row < self.rows:
+			raise IndexError("WallPlane row out of range")
+		return row
+
+	def get(self, row, index):
+		"""Return whether the wall at (row, index) exists."""
+		bit = row * self.length + index
+		return (self.bits[bit >> 3] >> (bit & 7)) & 1 == 1
+
+	def set(self, row, index, value):
+		"""Set the existence of the wall at (row, index) to value."""
+		self.set_bit(row * self.length + index, value)
+
+	def get_bit(self, bit):
+		"""Return whether the wall at flat bit index bit exists."""
+		return (self.bits[bit >> 3] >> (bit & 7)) & 1 == 1
+
+	def set_bit(self, bit, value):
+		"""Set the existence of the wall at flat bit index bit to value."""
+		self.version += 1
+		if value:
+			self.bits[bit >> 3] |= 1 << (bit & 7)
+		else:
+			self.bits[bit >> 3] &= ~(1 << (bit & 7))
+
+	def read_bits(self, start, count):
+		"""
+		Read count consecutive bits as an int.
+
+		Args:
+			start (int) -- Flat bit index of the first wall.
+			count (int) -- The number of walls to read.
+
+		Returns:
+			int whose bit i is the wall at flat index start + i.
+		"""
+		if count <= 0:
+			return 0
+		first = start >> 3
+		last = (start + count + 7) >> 3
+		value = int.from_bytes(self.bits[first:last], 'little')
+		return (value >> (start & 7)) & ((1 << count) - 1)
+
+	def write_bits(self, start, count, value):
+		"""
+		Write count consecutive bits from an int.
+
+		Args:
+			start (int) -- Flat bit index of the first wall.
+			count (int) -- The number of walls to write.
+			value (int) -- Bit i is written to flat index start + i.
+		"""
+		if count <= 0:
+			return
+		self.version += 1
+		first = start >> 3
+		last = (start + count + 7) >> 3
+		shift = start & 7
+		mask = ((1 << count) - 1) << shift
+		current = int.from_bytes(self.bits[first:last], 'little')
+		current = (current & ~mask) | ((value << shift) & mask)
+		self.bits[first:last] = current.to_bytes(last - first, 'little')
+
+	def wall_runs(self, row):
+		"""
+		Find the runs of consecutive walls in a row.
+
+		Args:
+			row (int) -- Index of the row.
+
+		Yields:
+			(int, int) of the index of the first wall in each run and
+			the index just past its last wall.
+		"""
+		walls = bit_string(self.read_bits(row * self.length, self.length),
+						   self.length)
+		for run in WALL_RUN.finditer(walls):
+			yield run.span()
+
+	def touch(self):
+		"""Record a write made straight to bits."""
+		self.version += 1
+
+	def fill(self, value):
+		"""Set every wall in the plane to value."""
+		self.set_range(0, self.rows * self.length, value)
+
+	def fill_row(self, row, value):
+		"""Set every wall in a row to value."""
+		start = self.check_row(row) * self.length
+		self.set_range(start, start + self.length, value)
+
+	def set_range(self, start, stop, value):
+		"""
+		Set the bits from start up to (but not including) stop.
+
+		Whole bytes are written with slice assignments of at most
+		fill_chunk bytes, so only the partial bytes at either end are
+		handled bit by bit, and filling a large plane does not build a
+		second plane's worth of bytes to copy from.
+		"""
+		self.version += 1
+		while start < stop and start & 7:
+			self.set_bit(start, value)
+			start += 1
+		while stop > start and stop & 7:
+			stop -= 1
+			self.set_bit(stop, value)
+		if start < stop:
+			bits = self.bits
+			first, last = start >> 3, stop >> 3
+			fill = bytes([0xFF if value else 0]) * min(last - first,
+													   self.fill_chunk)
+			for chunk in range(first, last, len(fill)):
+				end = min(chunk + len(fill), last)
+				bits[chunk:end] = fill[:end - chunk]
+
+class WallRow:
+	"""A list-like view of one row of a WallPlane."""
+
+	def __init__(self, plane, row):
+		"""
+		Initialize WallRow.
+
+		Args:
+			plane (WallPlane) -- The plane the row belongs to.
+			row (int) -- The index of the row in the plane.
+		"""
+		self.plane = plane
+		self.row = row
+
+	def __len__(self):
+		"""Return the number of walls in the row."""
+		return self.plane.length
+
+	def check_index(self, index):
+		"""Return index as a non-negative index or raise IndexError."""
+		if index < 0:
+			index += self.plane.length
+		if not 0 <= index < self.plane.length:
+			raise IndexError("WallRow index out of range")
+		return index
+
+	def __getitem__(self, index):
+		"""Return whether the wall at index exists."""
+		return self.plane.get(self.row, self.check_index(index))
+
+	def __setitem__(self, index, value):
+		"""Set the existence of the wall at index to value."""
+		self.plane.set(self.row, self.check_index(index), value)
+
+	def __iter__(self):
+		"""Iterate over the walls in the row."""
+		for index in range(self.plane.length):
+			yield self.plane.get(self.row, index)
 
 def fill_maze_no_inner_walls(maze):
 	"""Fill maze with just outer walls."""
-	maze.slabs = [[False for i in range(len(maze))]
-				   for j in range(len(maze)+1)]
+	maze.slabs = WallPlane(len(maze)+1, len(maze))
+	maze.columns = WallPlane(len(maze)+1, len(maze))
+
+	maze.slabs.fill_row(0, True)
+	maze.slabs.fill_row(-1, True)
+
+	maze.columns.fill_row(0, True)
+	maze.columns.fill_row(-1, True)
+
+# Turn '0' (no wall) into the bit of a direction in a passage mask, and
+# '1' into nothing.
+OPEN_BITS = [bytes.maketrans(b'01', bytes([1 << direction, 0]))
+			 for direction in (NORTH, SOUTH, WEST, EAST)]
+
+# Turn strings of '0'/'1' walls into the symbols used by Maze.__str__.
+SLAB_SYMBOLS = str.maketrans('01', ' -')
+COLUMN_SYMBOLS = str.maketrans('01', ' |')
+
+def render_slab_line(walls):
+	"""
+	Render one line of horizontal walls as text.
 
-	maze.columns = [[False for i in range(len(maze))]
-					 for j in range(len(maze)+1)]
+	Args:
+		walls (str) -- A '0' or '1' for each wall along the line.
 
-	maze.slabs[0] = [True for i in range(len(maze))]
-	maze.slabs[-1] = [True for i in range(len(maze))]
+	Returns:
+		str such as '+-+ +-+'.
+	"""
+	if not walls:
+		return '+'
+	return '+' + '+'.join(walls.translate(SLAB_SYMBOLS)) + '+'
 
-	maze.columns[0] = [True for i in range(len(maze))]
-	maze.columns[-1] = [True for i in range(len(maze))]
+def render_column_line(walls):
+	"""
+	Render one line of vertical walls as text.
+
+	Args:
+		walls (str) -- A '0' or '1' for each wall across the line.
+
+	Returns:
+		str such as '|   | |'.
+	"""
+	return ' '.join(walls.translate(COLUMN_SYMBOLS))
 
 class Maze:
 	"""Represents a square Maze, its cells, walls, and all."""
@@ -29,11 +374,107 @@ class Maze:
 			(default: fill_maze_no_inner_walls).
 		"""
 		self.size = size
-		self.slabs = None # Represents horizontal cell borders.
-		self.columns = None # Represents vertical cell borders.
+		self.slabs = None # WallPlane of horizontal cell borders.
+		self.columns = None # WallPlane of vertical cell borders.
+		self.algorithm = None # Name of the algorithm that made the maze.
+		self.seed = None # Seed the algorithm was given.
+		# bytearray of the open directions of every cell, or None until
+		# it is needed, and the plane_state it was read in. Use
+		# passage_mask(), which reads it again once the planes change.
+		self.passages = None
+		self.passages_state = None
 
 		gen_func(self)
 
+	def save(self, path):
+		"""
+		Write the maze to a binary maze file.
+
+		The file is written to path + '.tmp' and then moved over path,
+		so a maze loaded from path with mmap, whose planes are still
+		mapped from the old file, can be saved back to it.
+
+		Args:
+			path (str) -- The file to write.
+
+		Raises:
+			ValueError if the seed is not in range(MAZE_FILE_SEED_LIMIT).
+		"""
+		if self.seed is not None and \
+		   not 0 <= self.seed < MAZE_FILE_SEED_LIMIT:
+			raise ValueError("Seed " + str(self.seed)
+							 + " does not fit in a maze file")
+		name = (self.algorithm or '').encode('utf-8')
+		flags = 0 if self.seed is None else MAZE_FILE_HAS_SEED
+		header = MAZE_FILE_HEADER.pack(MAZE_FILE_MAGIC, MAZE_FILE_VERSION,
+									   flags, len(name), self.size,
+									   self.seed or 0)
+		header += name
+		header += bytes(-len(header) % 8)
+
+		temporary = str(path) + '.tmp'
+		try:
+			with open(temporary, 'wb') as file:
+				file.write(header)
+				file.write(self.slabs.bits)
+				file.write(self.columns.bits)
+			os.replace(temporary, path)
+		except BaseException:
+			if os.path.exists(temporary):
+				os.unlink(temporary)
+			raise
+
+	@classmethod
+	def load(cls, path, mmap=True):
+		"""
+		Read a maze from a binary maze file.
+
+		Args:
+			path (str) -- The file to read.
+			mmap (bool) -- If True, the wall planes are memoryviews of a
+			copy-on-write memory map of the file, so nothing is read
+			until it is used and the file itself is never modified
+			(default: True).
+
+		Returns:
+			Maze with the walls, algorithm and seed stored in the file.
+		"""
+		with open(path, 'rb') as file:
+			if mmap:
+				buffer = MemoryMap(file.fileno(), 0, access=ACCESS_COPY)
+			else:
+				buffer = bytearray(file.read())
+		view = memoryview(buffer)
+
+		if len(view) < MAZE_FILE_HEADER.size:
+			raise ValueError(str(path) + " is not a maze file")
+		magic, version, flags, name_length, size, seed = \
+			MAZE_FILE_HEADER.unpack_from(view)
+		if magic != MAZE_FILE_MAGIC:
+			raise ValueError(str(path) + " is not a maze file")
+		if version != MAZE_FILE_VERSION:
+			raise ValueError("Unsupported maze file version: " + str(version))
+
+		start = MAZE_FILE_HEADER.size
+		name = bytes(view[start:start+name_length]).decode('utf-8')
+		start += name_length
+		start += -start % 8
+		length = plane_bytes(size + 1, size)
+		if len(view) < start + 2 * length:
+			raise ValueError(str(path) + " is truncated")
+
+		def attach_planes(maze):
+			maze.slabs = WallPlane(size + 1, size,
+								   bits=view[start:start+length])
+			maze.columns = WallPlane(size + 1, size,
+									 bits=view[start+length:start+2*length])
+
+		maze = cls(size, attach_planes)
+		maze.algorithm = name or None
+		if flags & MAZE_FILE_HAS_SEED:
+			maze.seed = seed
+		return maze
+
 	def __getitem__(self, key):
 		"""
 		Compute and return a dict containing info on the borders around
@@ -45,11 +486,17 @@ class Maze:
 		Returns:
 			A dictionary. For each side of the cell, True indicates the
 			presence of a wall and False the lack thereof.
+
+		Raises:
+			IndexError if the cell is outside the maze.
 		"""
 		x = key[0]
 		y = key[1]
-		return {'N':self.slabs[y][x], 'S':self.slabs[y+1][x],
-				'W':self.columns[x][y], 'E':self.columns[x+1][y] }
+		self.check_cell(x, y)
+		slabs = self.slabs
+		columns = self.columns
+		return {'N':slabs.get(y, x), 'S':slabs.get(y+1, x),
+				'W':columns.get(x, y), 'E':columns.get(x+1, y) }
 
 	def __setitem__(self, key, value):
 		"""
@@ -59,50 +506,206 @@ class Maze:
 			key (int, int, str) -- Indicates cell location and direction
 			of a border.
 			value (bool) -- The value that the border will take on.
+
+		Raises:
+			IndexError if the cell is outside the maze.
 		"""
-		x = key[0]
-		y = key[1]
-		letter = key[2]
+		self.check_cell(key[0], key[1])
+		direction = DIRECTION_INDEX.get(key[2])
+		if direction is not None:
+			self.set_wall(key[1] * self.size + key[0], direction, value)
+
+	def check_cell(self, x, y):
+		"""Raise IndexError unless (x, y) is a cell of the maze."""
+		if not (0 <= x < self.size and 0 <= y < self.size):
+			raise IndexError("Maze cell (" + str(x) + ", " + str(y)
+							 + ") out of range")
+
+	def wall_bit(self, cell, direction):
+		"""
+		Locate the border of a cell in the wall planes. Like has_wall
+		and set_wall this is the generators' fast path and does not
+		check that cell is in the maze; maze[x, y] does.
 
-		if letter == 'N':   self.slabs[y][x] = value
-		elif letter == 'S': self.slabs[y+1][x] = value
-		elif letter == 'W': self.columns[x][y] = value
-		elif letter == 'E': self.columns[x+1][y] = value
+		Args:
+			cell (int) -- Flat index of the cell, y * size + x.
+			direction (int) -- One of NORTH, SOUTH, WEST or EAST.
+
+		Returns:
+			(WallPlane, int) of the plane and flat bit index of the border.
+		"""
+		size = self.size
+		if direction < WEST:
+			# slabs[y][x] is bit y * size + x, i.e. the cell index itself.
+			return self.slabs, cell + size * direction
+		y, x = divmod(cell, size)
+		return self.columns, (x + direction - WEST) * size + y
+
+	def has_wall(self, cell, direction):
+		"""
+		Determine whether or not a border of a cell is a wall.
+
+		Args:
+			cell (int) -- Flat index of the cell, y * size + x.
+			direction (int) -- One of NORTH, SOUTH, WEST or EAST.
+
+		Returns:
+			bool indicating the presence of a wall.
+		"""
+		plane, bit = self.wall_bit(cell, direction)
+		return plane.get_bit(bit)
+
+	def set_wall(self, cell, direction, value):
+		"""
+		Set the existence of a border of a cell to value.
+
+		Args:
+			cell (int) -- Flat index of the cell, y * size + x.
+			direction (int) -- One of NORTH, SOUTH, WEST or EAST.
+			value (bool) -- The value that the border will take on.
+		"""
+		# Only a mask that matched the planes before is kept in step.
+		passages_current = (self.passages is not None and
+							self.passages_state == self.plane_state())
+
+		size = self.size
+		if direction < WEST:
+			self.slabs.set_bit(cell + size * direction, value)
+		else:
+			y, x = divmod(cell, size)
+			self.columns.set_bit((x + direction - WEST) * size + y, value)
+
+		if passages_current:
+			self.update_passage(cell, direction, value)
+			self.passages_state = self.plane_state()
+
+	def plane_state(self):
+		"""Return what identifies the current contents of the planes."""
+		return (self.slabs, self.slabs.version,
+				self.columns, self.columns.version)
+
+	def update_passage(self, cell, direction, value):
+		"""
+		Keep the passage mask of a cell and its neighbor in step with a
+		wall that has been set to value. Outer walls never lead
+		anywhere, so they are left out of the mask.
+		"""
+		size = self.size
+		if direction == NORTH:
+			if cell < size: return
+			neighbor = cell - size
+		elif direction == SOUTH:
+			if cell >= size * (size - 1): return
+			neighbor = cell + size
+		elif direction == WEST:
+			if cell % size == 0: return
+			neighbor = cell - 1
+		else:
+			if cell % size == size - 1: return
+			neighbor = cell + 1
+
+		passages = self.passages
+		if value:
+			passages[cell] &= ~(1 << direction)
+			passages[neighbor] &= ~(1 << OPPOSITE[direction])
+		else:
+			passages[cell] |= 1 << direction
+			passages[neighbor] |= 1 << OPPOSITE[direction]
+
+	def passage_mask(self):
+		"""
+		Return the open directions of every cell, reading them out of
+		the wall planes the first time they are asked for (e.g. after
+		load). set_wall keeps them up to date from then on, and any
+		other write to the planes makes them be read again.
+
+		Returns:
+			bytearray with one entry per cell, bit d set when the cell
+			has no wall on side d. Outer sides are never set.
+		"""
+		state = self.plane_state()
+		if self.passages is None or self.passages_state != state:
+			self.passages = self.read_passages()
+			self.passages_state = state
+		return self.passages
+
+	def read_passages(self):
+		"""Build the bytearray returned by passage_mask from the planes."""
+		size = self.size
+		count = size * size
+		if count == 0:
+			return bytearray()
+
+		slabs = bit_string(self.slabs.read_bits(size, count - size),
+						   count - size).encode('ascii')
+		columns = bit_string(self.columns.read_bits(0, (size + 1) * size),
+							 (size + 1) * size).encode('ascii')
+		# The column plane is indexed [x][y]; gather it into cell order,
+		# treating the outer walls as closed.
+		lines = [columns[y + size::size] for y in range(size)]
+		west = b''.join(b'1' + line[:size - 1] for line in lines)
+		east = b''.join(line[:size - 1] + b'1' for line in lines)
+		edge = b'1' * size
+
+		mask = 0
+		for walls, bits in ((edge + slabs, OPEN_BITS[NORTH]),
+							(slabs + edge, OPEN_BITS[SOUTH]),
+							(west, OPEN_BITS[WEST]),
+							(east, OPEN_BITS[EAST])):
+			mask |= int.from_bytes(walls.translate(bits), 'little')
+		return bytearray(mask.to_bytes(count, 'little'))
+
+	def open_directions(self, cell):
+		"""
+		Determine which ways a cell leads to its neighbors.
+
+		Args:
+			cell (int) -- Flat index of the cell, y * size + x.
+
+		Returns:
+			int with bit d set for each direction d without a wall.
+		"""
+		return self.passage_mask()[cell]
 
 	def __str__(self):
 		"""Return a string representation of the maze."""
-		result = []
-
-		for i in range(self.size + 1):
-
-			# handle slabs first
-			text_row = []
-			for j in range(self.size+1):
-				text_row.append('+')
-				if j < self.size:
-					if self.slabs[i][j]:
-						symbol = '-'
-					else:
-						symbol = ' '
-					text_row.append(symbol)
-
-			result.append(''.join(text_row))
-
-			# handle columns second
-			text_row = []
-			if i < self.size:
-				for j in range(self.size+1):
-					if self.columns[j][i]:
-						symbol = '|'
-					else:
-						symbol = ' '
-					text_row.append(symbol)
-					if j < self.size:
-						text_row.append(' ')
-
-			result.append(''.join(text_row))
-
-		return '\n'.join(result)
+		text = StringIO()
+		self.write_text(text)
+		return text.getvalue()
+
+	def write_text(self, file, block_rows=64):
+		"""
+		Write the string representation of the maze row by row, so the
+		whole text never has to be held in memory.
+
+		Args:
+			file -- Any object with a write(str) method.
+			block_rows (int) -- How many rows of column walls are
+			gathered at a time (default: 64).
+		"""
+		size = self.size
+		slabs = self.slabs
+		columns = self.columns
+
+		for top in range(0, size, block_rows):
+			rows = min(block_rows, size - top)
+
+			# Each column plane row runs down the maze, so gather a block
+			# of it for every x and read rows back out with a stride.
+			block = ''.join([bit_string(columns.read_bits(x * size + top, rows),
+										rows)
+							 for x in range(size + 1)])
+
+			for i in range(top, top + rows):
+				file.write(render_slab_line(
+					bit_string(slabs.read_bits(i * size, size), size)))
+				file.write('\n')
+				file.write(render_column_line(block[i - top::rows]))
+				file.write('\n')
+
+		file.write(render_slab_line(
+			bit_string(slabs.read_bits(size * size, size), size)))
+		file.write('\n')
 
 	def __len__(self):
 		"""Return the side length of the maze."""
@@ -114,12 +717,8 @@ class Maze:
 
 def fill_maze_all_walls(maze):
 	"""Fill maze with all possible walls."""
-	for row in maze.slabs:
-		for i in range(len(row)):
-			row[i] = True
-	for row in maze.columns:
-		for i in range(len(row)):
-			row[i] = True
+	maze.slabs.fill(True)
+	maze.columns.fill(True)
 
 class Node:
 	"""A Node represents a location with x,y coordinates."""
@@ -291,23 +890,172 @@ def find_unvisited_neighbors(pos, visited):
 	return good_neighbors
 
 class MGAlgorithm:
-	"""Template class for Maze Generation Algorithms."""
+	"""
+	Template class for Maze Generation Algorithms.
 
-	def __init__(self, maze):
-		"""Initialize MGAlgorithm object."""
+	Implementation Description:
+		Internally algorithms work on flat cell indices (y * size + x)
+		and the int directions NORTH, SOUTH, WEST and EAST. advance()
+		carries out one move and returns it as a (cell, direction)
+		pair; step() only builds Node and Edge objects on top of that
+		for callers who want them.
+	"""
+
+	def __init__(self, maze, seed=None):
+		"""
+		Initialize MGAlgorithm object.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated.
+			seed (int) -- Seed for this algorithm's own random number
+			generator, so that runs can be reproduced (default: None).
+		"""
 		self.maze = maze
+		self.random = Random(seed)
+		maze.algorithm = type(self).__name__
+		maze.seed = seed
 		fill_maze_all_walls(self.maze)
-		self.visited = [[False for j in range(len(maze))]
-						 for i in range(len(maze))]
+		self.size = len(maze)
+		self.visited = bytearray(self.size * self.size)
+		# How far away the neighbor in each direction is, in cells.
+		self.offsets = (-self.size, self.size, -1, 1)
+		# Type code for packed moves; cell indices need 64 bits past
+		# a side length of 46340.
+		self.move_typecode = 'i' if self.size * self.size < 2**31 else 'q'
 
 	def step(self):
 		"""
 		Remove one wall and visit a new square on the maze.
 
 		Returns:
-			None. Should return None or an Edge in an extended class.
+			None, or the Edge corresponding to the step that is taken.
+		"""
+		move = self.advance()
+		if move is None:
+			return None
+		return self.to_edge(move[0], move[1])
+
+	def advance(self):
+		"""
+		Remove one wall and visit a new square on the maze.
+
+		Returns:
+			None. Should return None or a (cell, direction) pair in an
+			extended class.
+		"""
+		return None # or return a move.
+
+	def step_many(self, n):
+		"""
+		Take up to n steps in one call.
+
+		Args:
+			n (int) -- The most moves to make.
+
+		Returns:
+			array of ints holding a cell, direction pair for each move
+			taken, one after the other. It holds fewer than n moves
+			once the maze is finished, and none after that.
+		"""
+		moves = array(self.move_typecode)
+		append = moves.append
+		advance = self.advance
+		for i in range(n):
+			move = advance()
+			if move is None:
+				break
+			append(move[0])
+			append(move[1])
+		return moves
+
+	def __iter__(self):
+		"""
+		Iterate over the remaining moves until the maze is finished.
+
+		Yields:
+			Edge corresponding to each step that is taken.
+		"""
+		while True:
+			move = self.step()
+			if move is None:
+				return
+			yield move
+
+	def iter_chunks(self, size):
+		"""
+		Iterate over the remaining moves in batches.
+
+		Args:
+			size (int) -- The most moves in each batch.
+
+		Yields:
+			array of cell, direction pairs, as returned by step_many.
+		"""
+		while True:
+			moves = self.step_many(size)
+			if len(moves) == 0:
+				return
+			yield moves
+
+	def to_edge(self, cell, direction, weight=None):
+		"""
+		Build the Edge for a move.
+
+		Args:
+			cell (int) -- Flat index of the cell the move starts from.
+			direction (int) -- The direction of the move.
+			weight (int) -- The weight of the edge (default: None).
+
+		Returns:
+			Edge from the cell to its neighbor in direction.
+		"""
+		y, x = divmod(cell, self.size)
+		return Edge(Node(x, y), Node(x + DX[direction], y + DY[direction]),
+					weight)
+
+	def unvisited_neighbors(self, cell):
+		"""
+		Determine all unvisited neighbors of a cell.
+
+		Args:
+			cell (int) -- Flat index of the cell.
+
+		Returns:
+			list of int directions that lead to unvisited cells.
+		"""
+		size = self.size
+		visited = self.visited
+		y, x = divmod(cell, size)
+		good_neighbors = []
+
+		# Same order as find_unvisited_neighbors.
+		if x > 0 and not visited[cell - 1]: good_neighbors.append(WEST)
+		if x < size - 1 and not visited[cell + 1]: good_neighbors.append(EAST)
+		if y > 0 and not visited[cell - size]: good_neighbors.append(NORTH)
+		if y < size - 1 and not visited[cell + size]: good_neighbors.append(SOUTH)
+
+		return good_neighbors
+
+	@classmethod
+	def generate(cls, maze, **options):
 		"""
-		return None # or return an edge.
+		Turn maze into a finished maze all at once, without animation.
+
+		Subclasses may override this with a faster engine that writes
+		the wall planes directly instead of taking one step at a time.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated.
+			options -- Keyword arguments passed on to the algorithm's
+			constructor, e.g. frontier=True for Prim's.
+
+		Returns:
+			The finished maze.
+		"""
+		algorithm = cls(maze, **options)
+		while algorithm.advance() is not None:
+			pass
+		return maze
 
 class PriorityQueue:
 	"""
@@ -328,10 +1076,12 @@ class PriorityQueue:
 		Insert item into the queue and maintain the heap property.
 
 		Args:
-			item -- any object that can be ordered with another object.
+			item -- any object that can be ordered with another object,
+			or a list of such objects.
 		"""
 		if type(item) is not list:
-			self.insert([item])
+			self.queue.append(item)
+			self.percolate_up(len(self))
 			return
 		for element in item:
 			self.queue.append(element)
@@ -348,10 +1098,18 @@ class PriorityQueue:
 		Returns:
 			item of arbitary type.
 		"""
-		result = self.queue.pop(index+1)
-		if len(self) - index > 1:
-			self.queue.insert(index+1, self.queue.pop(len(self)))
-			self.percolate_down(index+1)
+		if not 0 <= index < len(self):
+			raise IndexError("PriorityQueue index out of range")
+
+		# Fill the hole with the last item rather than shifting the list.
+		last = self.queue.pop()
+		if index == len(self):
+			return last
+
+		result = self.queue[index+1]
+		self.queue[index+1] = last
+		self.percolate_down(index+1)
+		self.percolate_up(index+1)
 
 		return result
 
@@ -363,47 +1121,243 @@ class PriorityQueue:
 		"""Return the highest priority item & keep heap property."""
 		return self.pop(0)
 
-	def percolate_up(self, index): # TODO: change to iterative.
+	def percolate_up(self, index):
 		"""
 		Compare the item at index to its parent and switch it with
 		its parent if it his higher priority, continuing to percolate
 		up until it is either the highest priority item or its parent
 		has a higher priority.
 		"""
-		if index == 1:
-			return
+		queue = self.queue
+		current = queue[index]
+
+		while index > 1:
+			parent = index // 2
+			if not current < queue[parent]:
+				break
+			queue[index] = queue[parent]
+			index = parent
 
-		current = self.queue[index]
-		parent = self.queue[index // 2]
-		if current < parent:
-			temp = current
-			self.queue[index] = parent
-			self.queue[index // 2] = temp
-			self.percolate_up(index // 2)
+		queue[index] = current
 
-	def percolate_down(self, index): # TODO: change to iterative.
+	def percolate_down(self, index):
 		"""
 		Compare the item at index to its children and switch it with
 		the highest priority child if that child is of higher priority
 		than the item at index, and thus continuing until it is a
 		parent that has no higher priority children.
 		"""
-		current = self.queue[index]
+		queue = self.queue
+		size = len(self)
+		current = queue[index]
+
+		while index * 2 <= size:
+			child = index * 2
+			if child + 1 <= size and queue[child + 1] < queue[child]:
+				child += 1
+			if not queue[child] < current:
+				break
+			queue[index] = queue[child]
+			index = child
+
+		queue[index] = current
+
+class IndexedHeap:
+	"""
+	Min-heap of cell indices keyed by weight, supporting decrease-key.
 
-		if index > len(self) / 2:
-			return
+	Implementation Description:
+		The heap is held in two parallel lists, weights and cells,
+		laid out the same way heapq lays out a list (the children of
+		slot i are 2i+1 and 2i+2). A compact array maps every cell to
+		its slot in the heap, or -1 if it is not queued, so a queued
+		cell can be found and re-keyed without searching.
+	"""
 
-		child = index * 2
-		if index * 2 + 1 < len(self):
-			challenger = index * 2 + 1
-			if self.queue[child] < self.queue[challenger]:
-				child = challenger
+	def __init__(self, capacity):
+		"""
+		Initialize IndexedHeap.
 
-		if self.queue[child] < current:
-			temp = current
-			self.queue[index] = self.queue[child]
-			self.queue[child] = temp
-			self.percolate_down(child)
+		Args:
+			capacity (int) -- One more than the largest cell index that
+			will ever be queued.
+		"""
+		self.weights = []
+		self.cells = []
+		self.position = array('l', [-1]) * capacity
+
+	def __len__(self):
+		"""Return the number of cells in the heap."""
+		return len(self.cells)
+
+	def __contains__(self, cell):
+		"""Determine whether or not cell is in the heap."""
+		return self.position[cell] >= 0
+
+	def weight_of(self, cell):
+		"""Return the weight cell is queued with."""
+		return self.weights[self.position[cell]]
+
+	def push(self, cell, weight):
+		"""
+		Insert cell with weight, or lower its weight if it is queued.
+
+		Args:
+			cell (int) -- The cell index to queue.
+			weight (float) -- The priority of the cell, lowest first.
+
+		Returns:
+			bool indicating whether or not the heap changed.
+		"""
+		slot = self.position[cell]
+		if slot >= 0:
+			return self.decrease_key(cell, weight)
+
+		self.weights.append(weight)
+		self.cells.append(cell)
+		self.sift_up(len(self.cells) - 1)
+		return True
+
+	def decrease_key(self, cell, weight):
+		"""
+		Lower the weight of a queued cell.
+
+		Args:
+			cell (int) -- A cell index that is in the heap.
+			weight (float) -- The new weight.
+
+		Returns:
+			bool indicating whether or not the weight was lowered.
+		"""
+		slot = self.position[cell]
+		if not weight < self.weights[slot]:
+			return False
+		self.weights[slot] = weight
+		self.sift_up(slot)
+		return True
+
+	def peek(self):
+		"""Return (weight, cell) for the lowest weight cell."""
+		return self.weights[0], self.cells[0]
+
+	def pop(self):
+		"""
+		Remove and return the lowest weight cell.
+
+		Returns:
+			(float, int) of the weight and index of the cell.
+		"""
+		weights = self.weights
+		cells = self.cells
+		weight = weights[0]
+		cell = cells[0]
+		self.position[cell] = -1
+
+		last_weight = weights.pop()
+		last_cell = cells.pop()
+		if cells:
+			weights[0] = last_weight
+			cells[0] = last_cell
+			self.sift_down(0)
+
+		return weight, cell
+
+	def sift_up(self, slot):
+		"""Move the cell at slot towards the root until it is in order."""
+		weights = self.weights
+		cells = self.cells
+		position = self.position
+		weight = weights[slot]
+		cell = cells[slot]
+
+		while slot > 0:
+			parent = (slot - 1) >> 1
+			if not weight < weights[parent]:
+				break
+			weights[slot] = weights[parent]
+			cells[slot] = cells[parent]
+			position[cells[slot]] = slot
+			slot = parent
+
+		weights[slot] = weight
+		cells[slot] = cell
+		position[cell] = slot
+
+	def sift_down(self, slot):
+		"""Move the cell at slot towards the leaves until it is in order."""
+		weights = self.weights
+		cells = self.cells
+		position = self.position
+		size = len(cells)
+		weight = weights[slot]
+		cell = cells[slot]
+
+		while True:
+			child = 2 * slot + 1
+			if child >= size:
+				break
+			if child + 1 < size and weights[child + 1] < weights[child]:
+				child += 1
+			if not weights[child] < weight:
+				break
+			weights[slot] = weights[child]
+			cells[slot] = cells[child]
+			position[cells[slot]] = slot
+			slot = child
+
+		weights[slot] = weight
+		cells[slot] = cell
+		position[cell] = slot
+
+class UnionFind:
+	"""
+	Disjoint sets of cell indices.
+
+	Implementation Description:
+		parent is a flat array in which every root points at itself.
+		find halves the path it walks, and union hangs the tree of
+		lower rank below the other one, with ranks kept in a bytearray.
+	"""
+
+	def __init__(self, count, typecode='l'):
+		"""
+		Initialize UnionFind with every item in a set of its own.
+
+		Args:
+			count (int) -- The number of items, 0 to count - 1.
+			typecode (str) -- Array type code wide enough for count
+			(default: 'l').
+		"""
+		self.parent = array(typecode, range(count))
+		self.rank = bytearray(count)
+
+	def find(self, item):
+		"""Return the representative item of the set holding item."""
+		parent = self.parent
+		while parent[item] != item:
+			parent[item] = parent[parent[item]]
+			item = parent[item]
+		return item
+
+	def union(self, first, second):
+		"""
+		Merge the sets holding first and second.
+
+		Returns:
+			bool indicating whether or not they were in different sets.
+		"""
+		first = self.find(first)
+		second = self.find(second)
+		if first == second:
+			return False
+
+		rank = self.rank
+		if rank[first] < rank[second]:
+			first, second = second, first
+		self.parent[second] = first
+		if rank[first] == rank[second]:
+			rank[first] += 1
+		return True
 
 class DepthFirstMazeGenerator(MGAlgorithm):
 	"""
@@ -411,115 +1365,115 @@ class DepthFirstMazeGenerator(MGAlgorithm):
 	first search.
 	"""
 
-	def __init__(self, maze):
+	def __init__(self, maze, seed=None):
 		"""
 		Initialize DepthFirstMazeGenerator.
 
 		Args:
 			maze (Maze) -- The maze object that will be turned into a
 			a maze by the algorithm.
+			seed (int) -- Seed for the random choices (default: None).
 		"""
-		super().__init__(maze)
+		super().__init__(maze, seed)
 
-		self.start = Node(0,0)
+		self.start = 0
+		self.move_memory = [] # Stack of cell indices.
 
-		self.visited[self.start.x][self.start.y] = True
+		if self.size > 0:
+			self.visited[self.start] = True
+			self.move_memory.append(self.start)
 
-		self.move_memory = [self.start.copy()]
-
-	def step(self):
+	def advance(self):
 		"""
 		Determines a random square to move to from its current
 		position.
 
 		Returns:
-			Edge corresponding to the step that is taken.
+			(cell, direction) corresponding to the step that is taken.
 		"""
+		move_memory = self.move_memory
+
 		while True:
-			if len(self.move_memory) == 0:
+			if len(move_memory) == 0:
 				return None
 
-			curr_pos = self.move_memory[-1]
+			curr_pos = move_memory[-1]
 
-			move_options = find_unvisited_neighbors(curr_pos,
-													self.visited)
+			move_options = self.unvisited_neighbors(curr_pos)
 
 			if len(move_options) == 0:
-				self.move_memory.pop()
+				move_memory.pop()
 				continue
 
-			direction = choice(move_options)
+			direction = self.random.choice(move_options)
 
-			self.maze[curr_pos.x, curr_pos.y, direction] = False
+			self.maze.set_wall(curr_pos, direction, False)
 
-			new_position = curr_pos.move_to(direction)
+			new_position = curr_pos + self.offsets[direction]
 
-			self.move_memory.append(new_position)
+			move_memory.append(new_position)
 
-			self.visited[new_position.x][new_position.y] = True
+			self.visited[new_position] = True
 
-			return Edge(curr_pos, new_position)
+			return curr_pos, direction
 
 class BinaryTreeMazeGenerator(MGAlgorithm):
 	"""
 	Maze generation algorithm that creates a binary branching tree.
 	"""
 
-	def __init__(self, maze):
+	def __init__(self, maze, seed=None):
 		"""
 		Initialize BinaryTreeMazeGenerator.
 
 		Args:
 			maze (Maze) -- The maze that will be mutated into an actual
 			maze by the algorithm.
+			seed (int) -- Seed for the random choices (default: None).
 		"""
-		super().__init__(maze)
+		super().__init__(maze, seed)
 
 
-		self.root_position = Node(0, self.maze.size-1)
-		self.wandering_position = self.root_position.copy()
-		self.finished = False
+		# Cell indices; the root walks the rows from the bottom up.
+		self.root_position = (self.size - 1) * self.size
+		self.wandering_position = self.root_position
+		self.finished = self.size == 0
 		self.traversing = True
 
 	def traverse(self):
 		"""Create an exit from the current position to left or top."""
-		x = self.wandering_position.x
-		y = self.wandering_position.y
-		if self.visited[x][y]:
+		cell = self.wandering_position
+		if self.visited[cell]:
 			return None
 
-		self.visited[x][y] = True
+		self.visited[cell] = True
 
-		options = ['N', 'W']
-		if y == 0: options.remove('N')
-		if x == 0: options.remove('W')
+		options = [NORTH, WEST]
+		if cell < self.size: options.remove(NORTH)
+		if cell % self.size == 0: options.remove(WEST)
 
 		if len(options) == 0:
 			return None # i.e.: top left corner has been reached.
 
-		direction = choice(options)
-		self.maze[x, y, direction] = False # remove wall
+		direction = self.random.choice(options)
+		self.maze.set_wall(cell, direction, False) # remove wall
 
-		new_position = self.wandering_position.move_to(direction)
-		result = Edge(self.wandering_position, new_position)
-		self.wandering_position = new_position
+		self.wandering_position = cell + self.offsets[direction]
 
-		return result
+		return cell, direction
 
 	def increment(self):
 		"""Shift the root_position by 1 and handling overflow."""
-		self.root_position.x += 1
-		if self.root_position.x >= self.maze.size:
-			self.root_position.x = 0
-			self.root_position.y -= 1
+		self.root_position += 1
+		if self.root_position % self.size == 0:
+			self.root_position -= 2 * self.size
 
-
-	def step(self):
+	def advance(self):
 		"""
 		Determine an unvisited square and create a path out of it.
 
 		Returns:
-			Edge corresponding to the step that is taken.
+			(cell, direction) corresponding to the step that is taken.
 		"""
 		if self.finished:
 			return None
@@ -527,8 +1481,8 @@ class BinaryTreeMazeGenerator(MGAlgorithm):
 		while True:
 			if not self.traversing:
 				self.increment()
-				self.wandering_position = self.root_position.copy()
-				if self.root_position.y < 0:
+				self.wandering_position = self.root_position
+				if self.root_position < 0:
 					self.finished = True
 					return None
 				self.traversing = True
@@ -539,37 +1493,132 @@ class BinaryTreeMazeGenerator(MGAlgorithm):
 
 			self.traversing = False
 
+	@classmethod
+	def generate(cls, maze, seed=None):
+		"""
+		Turn maze into a binary tree maze in one go.
+
+		Every cell other than the top left corner opens either its
+		north or west wall, so the choices for a whole row can be drawn
+		at once and written straight into the wall planes (with numpy,
+		all rows are written at once).
+
+		The choices come from Random(seed) whether or not numpy is
+		installed, so a seed gives the same maze everywhere. They are
+		drawn row by row rather than in the order step() walks the
+		cells, so this is a different maze from the one stepping the
+		generator with the same seed makes.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated.
+			seed (int) -- Seed for the random choices (default: None).
+
+		Returns:
+			The finished maze.
+		"""
+		fill_maze_all_walls(maze)
+		maze.algorithm = cls.__name__
+		maze.seed = seed
+		size = len(maze)
+		if size == 0:
+			return maze
+
+		# Bit x of norths[y] is set where cell (x, y) opens its north
+		# wall. The top row can only go west and column 0 only north.
+		getrandbits = Random(seed).getrandbits
+		norths = [0] + [getrandbits(size) | 1 for y in range(1, size)]
+
+		np = optional_numpy()
+		if np is not None:
+			row_bytes = (size + 7) // 8
+			packed = b''.join(north.to_bytes(row_bytes, 'little')
+							  for north in norths)
+			north = np.unpackbits(np.frombuffer(packed, dtype=np.uint8),
+								  bitorder='little').reshape(size, -1)
+			north = north[:, :size].astype(bool)
+			west = ~north
+			west[0, 0] = False
+
+			slabs = np.ones((size + 1, size), dtype=bool)
+			slabs[:size] &= ~north
+			columns = np.ones((size + 1, size), dtype=bool)
+			columns[:size] &= ~west.T
+
+			maze.slabs.bits[:] = np.packbits(slabs, bitorder='little').tobytes()
+			maze.columns.bits[:] = np.packbits(columns, bitorder='little').tobytes()
+			maze.slabs.touch()
+			maze.columns.touch()
+			return maze
+
+		full_row = (1 << size) - 1
+		for y in range(1, size):
+			north = norths[y]
+			maze.slabs.write_bits(y * size, size, full_row & ~north)
+			for x in range(1, size):
+				if not (north >> x) & 1:
+					maze.columns.set(x, y, False)
+		for x in range(1, size):
+			maze.columns.set(x, 0, False)
+		return maze
+
 class PrimsAlgorithmMazeGenerator(MGAlgorithm):
 	"""
 	Maze generation Algorithm based off of Prim's (Greedy) Algorithm.
 	"""
 
-	def __init__(self, maze):
+	def __init__(self, maze, frontier=False, seed=None):
 		"""
 		Initialize PrimsAlgorithmGenerator.
 
 		Args:
 			maze (Maze) -- The maze that will be mutated into an actual
 			maze by the algorithm.
+			frontier (bool) -- If True, queue each unvisited cell once,
+			keyed by the cheapest edge found to it so far, instead of
+			queueing every edge (default: False).
+			seed (int) -- Seed for the edge weights (default: None).
 		"""
-		super().__init__(maze)
+		super().__init__(maze, seed)
 
 
-		self.start = Node(self.maze.size // 2, self.maze.size // 2)
+		self.start = (self.size // 2) * self.size + self.size // 2
+		self.frontier = frontier
+		self.max_weight = 1000
+		self.last_weight = None
 
-		max = 1000
-		self.queue = PriorityQueue()
+		if frontier:
+			self.queue = IndexedHeap(self.size * self.size)
+			# The direction each queued cell's cheapest edge points in.
+			self.entry_direction = bytearray(self.size * self.size)
+		else:
+			self.queue = PriorityQueue()
 
-		random_int = lambda max : int(random() * max) + 1
+		if self.size > 0:
+			self.visited[self.start] = True
+			self.queue_edges(self.start)
 
-		self.create_weighted_edges = lambda pos : \
-			[Edge(pos, pos.move_to(direction), random_int(max))
-			 for direction in find_unvisited_neighbors(
-                                                pos, self.visited)]
+	def random_weight(self):
+		"""Return a random edge weight from 1 to max_weight."""
+		return int(self.random.random() * self.max_weight) + 1
 
-		self.visited[self.start.x][self.start.y] = True
-		self.queue.insert(self.create_weighted_edges(self.start))
+	def queue_edges(self, cell):
+		"""
+		Queue the edges from cell to its unvisited neighbors. In
+		frontier mode only the neighbors that cell offers a cheaper
+		edge to are updated.
 
+		Args:
+			cell (int) -- The cell that has just been visited.
+		"""
+		if not self.frontier:
+			self.queue.insert([(self.random_weight(), cell, direction)
+							   for direction in self.unvisited_neighbors(cell)])
+			return
+
+		for direction in self.unvisited_neighbors(cell):
+			neighbor = cell + self.offsets[direction]
+			if self.queue.push(neighbor, self.random_weight()):
+				self.entry_direction[neighbor] = direction
 
 	def step(self):
 		"""
@@ -578,20 +1627,695 @@ class PrimsAlgorithmMazeGenerator(MGAlgorithm):
 		Returns:
 			Edge corresponding to the step that is taken.
 		"""
+		move = self.advance()
+		if move is None:
+			return None
+		return self.to_edge(move[0], move[1], self.last_weight)
+
+	def advance(self):
+		"""
+		Determines the lowest weight edge and moves to it.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		if self.frontier:
+			return self.advance_frontier()
+
+		visited = self.visited
+
 		while True:
 			if len(self.queue) == 0:
 				return None
-			move = self.queue.get_min()
-			first = move.first
-			second = move.second
+			weight, cell, direction = self.queue.get_min()
+			second = cell + self.offsets[direction]
+
+			if visited[second]:
+				continue
+
+			visited[second] = True
+			self.maze.set_wall(cell, direction, False)
+			self.last_weight = weight
+
+			self.queue_edges(second)
+
+			return cell, direction
+
+	def advance_frontier(self):
+		"""
+		Visit the frontier cell with the cheapest edge. Every queued
+		cell is unvisited, so no pops are wasted on stale edges.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		if len(self.queue) == 0:
+			return None
+
+		weight, second = self.queue.pop()
+		direction = self.entry_direction[second]
+		cell = second - self.offsets[direction]
+
+		self.visited[second] = True
+		self.maze.set_wall(cell, direction, False)
+		self.last_weight = weight
+
+		self.queue_edges(second)
+
+		return cell, direction
+
+class KruskalMazeGenerator(MGAlgorithm):
+	"""
+	Maze generation algorithm based off of Kruskal's algorithm: inner
+	walls are knocked down in a random order whenever they separate
+	two regions that are not connected yet.
+	"""
+
+	def __init__(self, maze, seed=None):
+		"""
+		Initialize KruskalMazeGenerator.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated into an actual
+			maze by the algorithm.
+			seed (int) -- Seed for the wall order (default: None).
+		"""
+		super().__init__(maze, seed)
+
+		self.sets = UnionFind(self.size * self.size, self.move_typecode)
+		self.walls = self.shuffled_walls()
+		self.wall_index = 0
+		self.joins_left = max(self.size * self.size - 1, 0)
+
+	def shuffled_walls(self):
+		"""
+		List every inner wall once, in a random order.
+
+		Returns:
+			array of walls, each encoded as cell * 2 for the wall east
+			of cell or cell * 2 + 1 for the wall south of it.
+		"""
+		size = self.size
+		last_row = size * (size - 1)
+		# Wall codes run up to 2 * size * size, twice the largest cell.
+		walls = array('i' if 2 * size * size < 2**31 else 'q')
+		for cell in range(size * size):
+			if (cell + 1) % size:
+				walls.append(cell * 2)
+			if cell < last_row:
+				walls.append(cell * 2 + 1)
+		self.random.shuffle(walls)
+		return walls
+
+	def advance(self):
+		"""
+		Knock down the next wall that joins two separate regions.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		walls = self.walls
+		offsets = self.offsets
+
+		while self.joins_left > 0 and self.wall_index < len(walls):
+			wall = walls[self.wall_index]
+			self.wall_index += 1
+
+			cell = wall >> 1
+			direction = SOUTH if wall & 1 else EAST
+			neighbor = cell + offsets[direction]
+			if not self.sets.union(cell, neighbor):
+				continue
+
+			self.maze.set_wall(cell, direction, False)
+			self.visited[cell] = self.visited[neighbor] = True
+			self.joins_left -= 1
+
+			return cell, direction
+
+		return None
+
+	@classmethod
+	def generate(cls, maze, seed=None):
+		"""
+		Turn maze into a Kruskal maze in one tight loop, with the union
+		find and the wall writes inlined.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated.
+			seed (int) -- Seed for the wall order (default: None).
+
+		Returns:
+			The finished maze.
+		"""
+		algorithm = cls(maze, seed)
+		size = algorithm.size
+		parent = algorithm.sets.parent
+		rank = algorithm.sets.rank
+		slab_bits = maze.slabs.bits
+		column_bits = maze.columns.bits
+		joins_left = algorithm.joins_left
+
+		for wall in algorithm.walls:
+			if joins_left == 0:
+				break
+			cell = wall >> 1
+			neighbor = cell + size if wall & 1 else cell + 1
+
+			first = cell
+			while parent[first] != first:
+				parent[first] = parent[parent[first]]
+				first = parent[first]
+			second = neighbor
+			while parent[second] != second:
+				parent[second] = parent[parent[second]]
+				second = parent[second]
+			if first == second:
+				continue
+
+			if rank[first] < rank[second]:
+				first, second = second, first
+			parent[second] = first
+			if rank[first] == rank[second]:
+				rank[first] += 1
+			joins_left -= 1
+
+			if wall & 1:
+				bit = neighbor # slabs[y+1][x]
+				slab_bits[bit >> 3] &= ~(1 << (bit & 7))
+			else:
+				y, x = divmod(cell, size)
+				bit = (x + 1) * size + y # columns[x+1][y]
+				column_bits[bit >> 3] &= ~(1 << (bit & 7))
+
+		maze.slabs.touch()
+		maze.columns.touch()
+		return maze
+
+def eller_rows(width, height, seed=None):
+	"""
+	Generate a maze with Eller's algorithm, one row at a time.
+
+	Only the set of each cell in the current row is remembered, so any
+	number of rows can be generated in memory proportional to width.
+
+	Args:
+		width (int) -- The number of cells in each row.
+		height (int) -- The number of rows.
+		seed (int) -- Seed for the random choices (default: None).
+
+	Yields:
+		(str, str) for each row, top to bottom, of its vertical walls
+		(width + 1 of them, outer walls included) and the walls below
+		it (width of them). Each wall is '1' if present and '0' if not.
+	"""
+	if width <= 0 or height <= 0:
+		return
+
+	random = Random(seed)
+	sets = list(range(width))
+
+	for y in range(height):
+		last = y == height - 1
+
+		# Relabel the sets 0 to width - 1 so one small UnionFind will do.
+		labels = {}
+		sets = [labels.setdefault(label, len(labels)) for label in sets]
+		joined = UnionFind(width)
+
+		# Join neighbors at random; the last row joins everything left.
+		walls = ['1'] * (width + 1)
+		for x in range(width - 1):
+			if (last or random.random() < 0.5) and \
+			   joined.union(sets[x], sets[x + 1]):
+				walls[x + 1] = '0'
+
+		below = ['1'] * width
+		if not last:
+			cells_in = {}
+			for x in range(width):
+				cells_in.setdefault(joined.find(sets[x]), []).append(x)
+
+			# Every set carries on down through at least one cell, the
+			# other cells of the next row start sets of their own.
+			next_sets = list(range(width, 2 * width))
+			for root, cells in cells_in.items():
+				down = [x for x in cells if random.random() < 0.5]
+				if not down:
+					down = [random.choice(cells)]
+				for x in down:
+					below[x] = '0'
+					next_sets[x] = root
+			sets = next_sets
+
+		yield ''.join(walls), ''.join(below)
+
+def write_rows_text(rows, width, file):
+	"""
+	Write a stream of maze rows in the same text format as Maze.__str__.
+
+	Args:
+		rows -- Iterable of (walls, below) rows, as yielded by eller_rows.
+		width (int) -- The number of cells in each row.
+		file -- Any object with a write(str) method.
+	"""
+	file.write(render_slab_line('1' * width))
+	file.write('\n')
+	for walls, below in rows:
+		file.write(render_column_line(walls))
+		file.write('\n')
+		file.write(render_slab_line(below))
+		file.write('\n')
+
+class EllerMazeGenerator(MGAlgorithm):
+	"""
+	Maze generation algorithm based off of Eller's algorithm, which
+	builds the maze one row at a time. See eller_rows for mazes that
+	are too tall to hold in memory.
+	"""
+
+	def __init__(self, maze, seed=None):
+		"""
+		Initialize EllerMazeGenerator.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated into an actual
+			maze by the algorithm.
+			seed (int) -- Seed for the random choices (default: None).
+		"""
+		super().__init__(maze, seed)
+
+		self.rows = eller_rows(self.size, self.size, seed)
+		self.row = 0
+		self.pending = [] # Moves of the current row, last one first.
+
+	def advance(self):
+		"""
+		Open the next wall of the current row.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		while not self.pending:
+			row = next(self.rows, None)
+			if row is None:
+				return None
+			walls, below = row
+			start = self.row * self.size
+			self.row += 1
+
+			moves = [(start + x, EAST) for x in range(self.size - 1)
+					 if walls[x + 1] == '0']
+			moves += [(start + x, SOUTH) for x in range(self.size)
+					  if below[x] == '0']
+			moves.reverse()
+			self.pending = moves
+
+		cell, direction = self.pending.pop()
+		self.maze.set_wall(cell, direction, False)
+		self.visited[cell] = True
+		self.visited[cell + self.offsets[direction]] = True
+
+		return cell, direction
+
+	@classmethod
+	def generate(cls, maze, seed=None):
+		"""
+		Turn maze into an Eller maze, writing each row's walls
+		straight into the wall planes.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated.
+			seed (int) -- Seed for the random choices (default: None).
+
+		Returns:
+			The finished maze.
+		"""
+		fill_maze_all_walls(maze)
+		maze.algorithm = cls.__name__
+		maze.seed = seed
+		size = len(maze)
+
+		for y, (walls, below) in enumerate(eller_rows(size, size, seed)):
+			maze.slabs.write_bits((y + 1) * size, size, int(below[::-1], 2))
+			for x in range(1, size):
+				if walls[x] == '0':
+					maze.columns.set(x, y, False)
+
+		return maze
+
+# Maps every byte to its low two bits, a random direction for a random byte.
+TWO_BITS = bytes(value & 3 for value in range(256))
+
+def border_mask(size):
+	"""
+	Mark which sides of each cell face the outside of a maze.
+
+	Args:
+		size (int) -- The side length of the maze.
+
+	Returns:
+		bytearray with one entry per cell, bit d set when the cell has
+		no neighbor in direction d.
+	"""
+	if size == 0:
+		return bytearray()
+	if size == 1:
+		row = bytes([1 << WEST | 1 << EAST])
+	else:
+		row = bytes([1 << WEST]) + bytes(size - 2) + bytes([1 << EAST])
+	mask = bytearray(row * size)
+	last_row = size * (size - 1)
+	for x in range(size):
+		mask[x] |= 1 << NORTH
+		mask[last_row + x] |= 1 << SOUTH
+	return mask
+
+class WilsonMazeGenerator(MGAlgorithm):
+	"""
+	Maze generation algorithm based off of Wilson's algorithm, which
+	picks every possible maze with equal probability.
+
+	Implementation Description:
+		A random walk starts from a cell outside the maze and runs until
+		it meets the maze. Each cell remembers only the direction the
+		walk last left it by, so loops are erased just by overwriting,
+		and following those directions from the start carves the
+		loop-erased path. Cells outside the maze are kept in a pool
+		that supports picking and removing a cell in O(1).
+	"""
+
+	def __init__(self, maze, seed=None):
+		"""
+		Initialize WilsonMazeGenerator.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated into an actual
+			maze by the algorithm.
+			seed (int) -- Seed for the random walks (default: None).
+		"""
+		super().__init__(maze, seed)
+
+		count = self.size * self.size
+		# Cells not in the maze yet, and where each one sits in the pool.
+		self.pool = array(self.move_typecode, range(count))
+		self.pool_position = array(self.move_typecode, range(count))
+		self.walk = bytearray(count) # Direction the walk last left by.
+		self.borders = border_mask(self.size)
+		self.path = None # Next cell of the walk being carved.
+
+		if count > 0:
+			self.add_to_maze(self.pool[self.random.randrange(count)])
+
+	def add_to_maze(self, cell):
+		"""Mark cell visited and swap it out of the pool."""
+		pool = self.pool
+		position = self.pool_position
+		self.visited[cell] = True
+
+		slot = position[cell]
+		last = pool.pop()
+		if last != cell:
+			pool[slot] = last
+			position[last] = slot
+
+	def walk_from(self, cell):
+		"""
+		Random walk from cell until the walk reaches the maze, recording
+		the direction each cell was last left by in self.walk.
+
+		Args:
+			cell (int) -- Flat index of a cell outside the maze.
+		"""
+		visited = self.visited
+		walk = self.walk
+		borders = self.borders
+		offsets = self.offsets
+		randbytes = self.random.randbytes
+		chunk = 16
+
+		# Directions come from random bytes, a growing chunk at a time so
+		# short walks waste little and long walks make few calls.
+		while True:
+			for direction in randbytes(chunk).translate(TWO_BITS):
+				if borders[cell] >> direction & 1:
+					continue
+				walk[cell] = direction
+				cell += offsets[direction]
+				if visited[cell]:
+					return
+			chunk = min(chunk * 2, 65536)
+
+	def advance(self):
+		"""
+		Carve the next wall of the current loop-erased walk, starting a
+		new walk first if there is none.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		if self.path is None:
+			if len(self.pool) == 0:
+				return None
+			self.path = self.pool[self.random.randrange(len(self.pool))]
+			self.walk_from(self.path)
+
+		cell = self.path
+		direction = self.walk[cell]
+		neighbor = cell + self.offsets[direction]
+
+		self.maze.set_wall(cell, direction, False)
+		self.add_to_maze(cell)
+		self.path = None if self.visited[neighbor] else neighbor
+
+		return cell, direction
+
+	@classmethod
+	def generate(cls, maze, seed=None):
+		"""
+		Turn maze into a Wilson maze, carving each walk with the pool
+		removal and the wall writes inlined.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated.
+			seed (int) -- Seed for the random walks (default: None).
+
+		Returns:
+			The finished maze.
+		"""
+		algorithm = cls(maze, seed)
+		size = algorithm.size
+		visited = algorithm.visited
+		walk = algorithm.walk
+		pool = algorithm.pool
+		position = algorithm.pool_position
+		offsets = algorithm.offsets
+		randrange = algorithm.random.randrange
+		walk_from = algorithm.walk_from
+		slab_bits = maze.slabs.bits
+		column_bits = maze.columns.bits
+
+		while pool:
+			cell = pool[randrange(len(pool))]
+			walk_from(cell)
+
+			while not visited[cell]:
+				direction = walk[cell]
+				if direction < WEST:
+					bit = cell + size * direction # slabs[y+direction][x]
+					slab_bits[bit >> 3] &= ~(1 << (bit & 7))
+				else:
+					y, x = divmod(cell, size)
+					bit = (x + direction - WEST) * size + y
+					column_bits[bit >> 3] &= ~(1 << (bit & 7))
+
+				visited[cell] = True
+				slot = position[cell]
+				last = pool.pop()
+				if last != cell:
+					pool[slot] = last
+					position[last] = slot
+
+				cell += offsets[direction]
+
+		maze.slabs.touch()
+		maze.columns.touch()
+		return maze
+
+class AldousBroderMazeGenerator(MGAlgorithm):
+	"""
+	Maze generation algorithm based off of the Aldous-Broder algorithm:
+	a random walk that knocks down the wall into every cell it enters
+	for the first time. Like Wilson's it picks every possible maze with
+	equal probability, but it is much slower to finish.
+	"""
+
+	def __init__(self, maze, seed=None):
+		"""
+		Initialize AldousBroderMazeGenerator.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated into an actual
+			maze by the algorithm.
+			seed (int) -- Seed for the random walk (default: None).
+		"""
+		super().__init__(maze, seed)
+
+		count = self.size * self.size
+		self.borders = border_mask(self.size)
+		self.remaining = max(count - 1, 0) # Cells left to enter.
+		self.position = 0
 
-			if self.visited[second.x][second.y]:
+		if count > 0:
+			self.position = self.random.randrange(count)
+			self.visited[self.position] = True
+
+	def advance(self):
+		"""
+		Walk until the walk enters a cell it has not been to before.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		visited = self.visited
+		borders = self.borders
+		offsets = self.offsets
+		getrandbits = self.random.getrandbits
+		cell = self.position
+
+		while self.remaining > 0:
+			direction = getrandbits(2)
+			if borders[cell] >> direction & 1:
 				continue
+			neighbor = cell + offsets[direction]
+			if visited[neighbor]:
+				cell = neighbor
+				continue
+
+			self.maze.set_wall(cell, direction, False)
+			visited[neighbor] = True
+			self.remaining -= 1
+			self.position = neighbor
+
+			return cell, direction
+
+		self.position = cell
+		return None
+
+# Cell selection policies of GrowingTreeMazeGenerator.
+GROWING_TREE_POLICIES = ('newest', 'random', 'oldest', 'mixed')
+
+class GrowingTreeMazeGenerator(MGAlgorithm):
+	"""
+	Maze generation algorithm based off of the growing tree algorithm.
+	Cells in the maze that may still have unvisited neighbors are kept
+	active, and each step grows the maze from one of them, chosen by a
+	policy: the newest gives depth first mazes, a random one gives
+	mazes like Prim's, and the oldest gives long straight corridors
+	fanning out from the start.
+
+	Implementation Description:
+		The active cells are an int array with a head index. The newest
+		cell is popped off the end, the oldest is dropped by moving the
+		head, and any other cell is replaced by the last one, so every
+		selection and removal is O(1). The dropped cells before the head
+		are deleted once they are half the array, which keeps it at most
+		twice the size of the active set at an amortized O(1) cost.
+	"""
+
+	def __init__(self, maze, policy='mixed', mix=0.5, seed=None):
+		"""
+		Initialize GrowingTreeMazeGenerator.
+
+		Args:
+			maze (Maze) -- The maze that will be mutated into an actual
+			maze by the algorithm.
+			policy (str) -- One of GROWING_TREE_POLICIES (default:
+			'mixed').
+			mix (float) -- For the 'mixed' policy, the chance of choosing
+			the newest cell rather than a random one (default: 0.5).
+			seed (int) -- Seed for the random choices (default: None).
+		"""
+		if policy not in GROWING_TREE_POLICIES:
+			raise ValueError("Policy: " + str(policy) + " not recognized.")
+
+		super().__init__(maze, seed)
+
+		self.policy = policy
+		self.mix = mix
+		self.active = array(self.move_typecode)
+		self.head = 0 # Index of the oldest active cell.
+
+		if self.size > 0:
+			start = self.random.randrange(self.size * self.size)
+			self.visited[start] = True
+			self.active.append(start)
+
+	def select(self):
+		"""Return the index in self.active of the cell to grow from."""
+		last = len(self.active) - 1
+		policy = self.policy
+
+		if policy == 'mixed':
+			policy = 'newest' if self.random.random() < self.mix else 'random'
+		if policy == 'newest':
+			return last
+		if policy == 'oldest':
+			return self.head
+		return self.random.randint(self.head, last)
+
+	def deactivate(self, index):
+		"""Remove the cell at index of self.active in amortized O(1)."""
+		active = self.active
+		if index == self.head:
+			self.head += 1
+		elif index == len(active) - 1:
+			active.pop()
+		else:
+			active[index] = active.pop()
+
+		if 2 * self.head >= len(active):
+			del active[:self.head]
+			self.head = 0
+
+	def advance(self):
+		"""
+		Grow the maze from an active cell into one of its unvisited
+		neighbors.
+
+		Returns:
+			(cell, direction) corresponding to the step that is taken.
+		"""
+		active = self.active
+
+		while self.head < len(active):
+			index = self.select()
+			cell = active[index]
+
+			move_options = self.unvisited_neighbors(cell)
+			if len(move_options) == 0:
+				self.deactivate(index)
+				continue
+
+			direction = self.random.choice(move_options)
+			neighbor = cell + self.offsets[direction]
+
+			self.maze.set_wall(cell, direction, False)
+			self.visited[neighbor] = True
+			active.append(neighbor)
 
-			self.visited[second.x][second.y] = True
-			self.maze[first.x, first.y, move.get_direction()] = False
+			return cell, direction
 
-			neighbors = self.create_weighted_edges(second)
-			self.queue.insert(neighbors)
+		return None
 
-			return move
+# Algorithms by the names the app and command line use for them.
+ALGORITHMS = {
+	'depth first': DepthFirstMazeGenerator,
+	'binary tree': BinaryTreeMazeGenerator,
+	'prims algorithm': PrimsAlgorithmMazeGenerator,
+	'kruskals algorithm': KruskalMazeGenerator,
+	'ellers algorithm': EllerMazeGenerator,
+	'wilsons algorithm': WilsonMazeGenerator,
+	'aldous broder': AldousBroderMazeGenerator,
+	'growing tree': GrowingTreeMazeGenerator,
+}
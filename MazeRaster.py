@@ -0,0 +1,151 @@
+"""
+MazeRaster paints mazes into RGB pixel buffers.
+
+Nothing here needs tkinter, so mazes can be exported as PPM or PNG
+images on machines without a display. The app shows the same buffers
+through a single tk.PhotoImage.
+"""
+import struct
+import zlib
+
+from MazeGenerators import optional_numpy
+
+black = (0, 0, 0)
+white = (255, 255, 255)
+
+class Raster:
+	"""
+	An RGB image held in a flat bytearray.
+
+	Implementation Description:
+		Pixels are stored row after row, three bytes each, which is the
+		layout of the body of a binary PPM file. When numpy is available
+		rectangles are filled through an ndarray view of the buffer,
+		otherwise one slice assignment is made per pixel row.
+	"""
+
+	def __init__(self, width, height, color=white):
+		"""
+		Initialize Raster.
+
+		Args:
+			width (int) -- Width of the image in pixels.
+			height (int) -- Height of the image in pixels.
+			color ((int, int, int)) -- The starting color of every
+			pixel (default: white).
+		"""
+		self.width = width
+		self.height = height
+		self.pixels = bytearray(bytes(color) * (width * height))
+
+		np = optional_numpy()
+		if np is not None:
+			self.array = np.frombuffer(self.pixels, dtype=np.uint8).reshape(
+				height, width, 3)
+		else:
+			self.array = None
+
+	def fill_rect(self, x_i, y_i, x_f, y_f, color):
+		"""
+		Paint the pixels from (x_i, y_i) up to (but not including)
+		(x_f, y_f), clipped to the image.
+
+		Args:
+			x_i, y_i (int) -- Top left corner of the rectangle.
+			x_f, y_f (int) -- Bottom right corner of the rectangle.
+			color ((int, int, int)) -- The color to paint.
+		"""
+		x_i = max(x_i, 0)
+		y_i = max(y_i, 0)
+		x_f = min(x_f, self.width)
+		y_f = min(y_f, self.height)
+		if x_i >= x_f or y_i >= y_f:
+			return
+
+		if self.array is not None:
+			self.array[y_i:y_f, x_i:x_f] = color
+			return
+
+		row = bytes(color) * (x_f - x_i)
+		for y in range(y_i, y_f):
+			start = (y * self.width + x_i) * 3
+			self.pixels[start:start + len(row)] = row
+
+	def to_ppm(self):
+		"""Return the image as the bytes of a binary PPM file."""
+		header = 'P6\n{} {}\n255\n'.format(self.width, self.height)
+		return header.encode('ascii') + bytes(self.pixels)
+
+	def to_png(self):
+		"""Return the image as the bytes of a PNG file."""
+		stride = self.width * 3
+		# Every scanline starts with filter type 0 (none).
+		scanlines = b''.join(b'\x00' + self.pixels[y*stride:(y+1)*stride]
+							 for y in range(self.height))
+
+		def chunk(kind, data):
+			body = kind + data
+			return (struct.pack('>I', len(data)) + body
+					+ struct.pack('>I', zlib.crc32(body) & 0xffffffff))
+
+		header = struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0)
+		return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+				+ chunk(b'IDAT', zlib.compress(scanlines, 6))
+				+ chunk(b'IEND', b''))
+
+	def save(self, path):
+		"""
+		Write the image to a file, as PNG if path ends in .png and as
+		PPM otherwise.
+
+		Args:
+			path (str) -- The file to write.
+		"""
+		data = self.to_png() if path.lower().endswith('.png') else self.to_ppm()
+		with open(path, 'wb') as file:
+			file.write(data)
+
+def maze_pixels(size, cell_pixels, wall_pixels):
+	"""Return the side length in pixels of a rendered maze."""
+	return size * cell_pixels + wall_pixels
+
+def render_maze(maze, cell_pixels=4, wall_pixels=1, wall_color=black,
+				blank_color=white):
+	"""
+	Paint a maze into a new Raster.
+
+	Every run of touching walls is painted as one rectangle, so the
+	work grows with the number of wall runs rather than pixels.
+
+	Args:
+		maze (Maze) -- The maze to paint.
+		cell_pixels (int) -- Distance between walls in pixels
+		(default: 4).
+		wall_pixels (int) -- Thickness of the walls in pixels
+		(default: 1).
+		wall_color ((int, int, int)) -- Color of the walls
+		(default: black).
+		blank_color ((int, int, int)) -- Color of the passages
+		(default: white).
+
+	Returns:
+		Raster of the maze.
+	"""
+	side = maze_pixels(len(maze), cell_pixels, wall_pixels)
+	raster = Raster(side, side, blank_color)
+
+	for i in range(len(maze.slabs)):
+		y = i * cell_pixels
+		for start, stop in maze.slabs.wall_runs(i):
+			raster.fill_rect(start * cell_pixels, y,
+							 stop * cell_pixels + wall_pixels, y + wall_pixels,
+							 wall_color)
+
+	for i in range(len(maze.columns)):
+		x = i * cell_pixels
+		for start, stop in maze.columns.wall_runs(i):
+			raster.fill_rect(x, start * cell_pixels,
+							 x + wall_pixels, stop * cell_pixels + wall_pixels,
+							 wall_color)
+
+	return raster
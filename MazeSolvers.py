@@ -0,0 +1,218 @@
+"""
+MazeSolvers finds distances and paths through mazes.
+
+Everything works on flat cell indices (y * size + x) and the maze's
+passage mask, a bytearray of open direction bits per cell, so no Node
+objects or dicts are built per cell.
+"""
+from array import array
+import heapq
+
+UNREACHED = 0xFFFFFFFF # Distance of a cell that cannot be reached.
+
+def neighbor_steps(size):
+	"""
+	Tabulate the open neighbors for every value of a passage mask.
+
+	Args:
+		size (int) -- The side length of the maze.
+
+	Returns:
+		list of 16 tuples of the cell offsets open in each mask value.
+	"""
+	offsets = (-size, size, -1, 1)
+	return [tuple(offsets[direction] for direction in range(4)
+				  if mask >> direction & 1) for mask in range(16)]
+
+def distance_field(maze, source):
+	"""
+	Breadth first search out from source over the whole maze.
+
+	Args:
+		maze (Maze) -- The maze to search.
+		source (int) -- Flat index of the cell to measure from.
+
+	Returns:
+		array('I') of the number of moves from source to every cell,
+		UNREACHED for cells that cannot be reached. With numpy it can be
+		viewed with numpy.frombuffer(field, dtype=numpy.uint32).
+	"""
+	size = len(maze)
+	mask = maze.passage_mask()
+	steps = neighbor_steps(size)
+
+	distance = array('I', [UNREACHED]) * (size * size)
+	distance[source] = 0
+	frontier = [source]
+	moves = 0
+
+	while frontier:
+		moves += 1
+		next_frontier = []
+		append = next_frontier.append
+		for cell in frontier:
+			for offset in steps[mask[cell]]:
+				neighbor = cell + offset
+				if distance[neighbor] == UNREACHED:
+					distance[neighbor] = moves
+					append(neighbor)
+		frontier = next_frontier
+
+	return distance
+
+def path_from_field(maze, distance, target):
+	"""
+	Walk back down a distance field from target to its source.
+
+	Args:
+		maze (Maze) -- The maze the field was measured on.
+		distance (array) -- A field returned by distance_field.
+		target (int) -- Flat index of the cell to find a path to.
+
+	Returns:
+		list of cell indices from the source to target, or None if
+		target cannot be reached.
+	"""
+	if distance[target] == UNREACHED:
+		return None
+	mask = maze.passage_mask()
+	steps = neighbor_steps(len(maze))
+
+	path = [target]
+	cell = target
+	while distance[cell] > 0:
+		closer = distance[cell] - 1
+		for offset in steps[mask[cell]]:
+			if distance[cell + offset] == closer:
+				cell += offset
+				break
+		path.append(cell)
+
+	path.reverse()
+	return path
+
+def shortest_path(maze, source, target):
+	"""
+	Find a shortest path between two cells with a full distance field.
+	Prefer bidirectional_search or astar for a single query on a large
+	maze; this is for when the field itself is wanted too.
+
+	Args:
+		maze (Maze) -- The maze to search.
+		source (int) -- Flat index of the first cell.
+		target (int) -- Flat index of the last cell.
+
+	Returns:
+		list of cell indices from source to target, or None.
+	"""
+	return path_from_field(maze, distance_field(maze, source), target)
+
+def join_paths(source_parents, target_parents, meeting):
+	"""
+	Join the two halves of a bidirectional search at meeting.
+
+	Returns:
+		list of cell indices from the source to the target.
+	"""
+	path = []
+	cell = meeting
+	while cell is not None:
+		path.append(cell)
+		cell = source_parents[cell]
+	path.reverse()
+
+	cell = target_parents[meeting]
+	while cell is not None:
+		path.append(cell)
+		cell = target_parents[cell]
+	return path
+
+def bidirectional_search(maze, source, target):
+	"""
+	Breadth first search from both ends at once, always growing the
+	smaller frontier, until the two searches meet.
+
+	Args:
+		maze (Maze) -- The maze to search.
+		source (int) -- Flat index of the first cell.
+		target (int) -- Flat index of the last cell.
+
+	Returns:
+		list of cell indices from source to target, or None.
+	"""
+	mask = maze.passage_mask()
+	steps = neighbor_steps(len(maze))
+
+	# Each side maps the cells it has reached to the cell it came from.
+	parents = ({source: None}, {target: None})
+	frontiers = ([source], [target])
+	if source == target:
+		return [source]
+
+	while frontiers[0] and frontiers[1]:
+		side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+		mine, theirs = parents[side], parents[1 - side]
+		next_frontier = []
+
+		for cell in frontiers[side]:
+			for offset in steps[mask[cell]]:
+				neighbor = cell + offset
+				if neighbor in mine:
+					continue
+				mine[neighbor] = cell
+				if neighbor in theirs:
+					return join_paths(parents[0], parents[1], neighbor)
+				next_frontier.append(neighbor)
+
+		frontiers = ((next_frontier, frontiers[1]) if side == 0
+					 else (frontiers[0], next_frontier))
+
+	return None
+
+def astar(maze, source, target):
+	"""
+	A* search guided by the Manhattan distance to target.
+
+	Args:
+		maze (Maze) -- The maze to search.
+		source (int) -- Flat index of the first cell.
+		target (int) -- Flat index of the last cell.
+
+	Returns:
+		list of cell indices from source to target, or None.
+	"""
+	size = len(maze)
+	mask = maze.passage_mask()
+	steps = neighbor_steps(size)
+	target_y, target_x = divmod(target, size)
+
+	def estimate(cell):
+		y, x = divmod(cell, size)
+		return abs(x - target_x) + abs(y - target_y)
+
+	moves = {source: 0}
+	parents = {source: None}
+	# Ties go to the cell closest to target, then to the lowest index.
+	queue = [(estimate(source), estimate(source), source)]
+
+	while queue:
+		_, _, cell = heapq.heappop(queue)
+		if cell == target:
+			path = []
+			while cell is not None:
+				path.append(cell)
+				cell = parents[cell]
+			path.reverse()
+			return path
+
+		next_moves = moves[cell] + 1
+		for offset in steps[mask[cell]]:
+			neighbor = cell + offset
+			if next_moves < moves.get(neighbor, UNREACHED):
+				moves[neighbor] = next_moves
+				parents[neighbor] = cell
+				remaining = estimate(neighbor)
+				heapq.heappush(queue, (next_moves + remaining, remaining,
+									   neighbor))
+
+	return None
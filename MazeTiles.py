@@ -0,0 +1,334 @@
+"""
+MazeTiles builds mazes that are too large to hold in memory out of
+square tiles.
+
+Every tile is an ordinary Maze made by one of the ALGORITHMS with a seed
+of its own, saved as a binary maze file and memory mapped back in when
+it is needed. A random spanning tree over the grid of tiles decides
+which neighboring tiles are joined, and each joined pair gets one door
+through their shared border, so the whole maze is still perfect.
+"""
+from array import array
+from collections import OrderedDict
+from io import StringIO
+import json
+import os
+from random import Random
+
+from MazeGenerators import (Maze, ALGORITHMS, UnionFind, maze_seed,
+							bit_string, render_slab_line, render_column_line,
+							MAZE_FILE_SEED_LIMIT, NORTH, SOUTH, WEST, EAST,
+							DX, DY)
+
+TILE_INDEX = 'tiles.json' # Parameters of a tiled maze, in its directory.
+
+def plan_stitches(tiles, tile_size, seed):
+	"""
+	Choose which tiles are joined and where their doors go.
+
+	Args:
+		tiles (int) -- The number of tiles along each side.
+		tile_size (int) -- The side length of each tile in cells.
+		seed (int) -- Seed for the spanning tree and the doors.
+
+	Returns:
+		(bytearray, array) of links and doors. Bit EAST or SOUTH of
+		links[t] is set when tile t = ty * tiles + tx is joined to its
+		east or south neighbor. doors[2*t] is the row of the door in the
+		east border of tile t and doors[2*t + 1] the column of the door
+		in its south border.
+	"""
+	count = tiles * tiles
+	random = Random(seed)
+	links = bytearray(count)
+	doors = array('l', [random.randrange(tile_size)
+						for i in range(2 * count)])
+
+	# Kruskal's over the tiles, with borders encoded as in
+	# KruskalMazeGenerator.shuffled_walls.
+	borders = array('l')
+	for tile in range(count):
+		if (tile + 1) % tiles:
+			borders.append(tile * 2)
+		if tile < count - tiles:
+			borders.append(tile * 2 + 1)
+	random.shuffle(borders)
+
+	joined = UnionFind(count)
+	for border in borders:
+		tile = border >> 1
+		direction = SOUTH if border & 1 else EAST
+		if joined.union(tile, tile + tiles if border & 1 else tile + 1):
+			links[tile] |= 1 << direction
+
+	return links, doors
+
+def tile_doors(links, doors, tiles, tile_size, tx, ty):
+	"""
+	List the doors through the borders of one tile.
+
+	Args:
+		links, doors -- The plan returned by plan_stitches.
+		tiles (int) -- The number of tiles along each side.
+		tile_size (int) -- The side length of each tile in cells.
+		tx, ty (int) -- The position of the tile in the grid of tiles.
+
+	Returns:
+		list of (cell, direction) pairs in the tile's own cell indices.
+	"""
+	tile = ty * tiles + tx
+	last = tile_size - 1
+	found = []
+	if links[tile] >> EAST & 1:
+		found.append((doors[2*tile] * tile_size + last, EAST))
+	if links[tile] >> SOUTH & 1:
+		found.append((last * tile_size + doors[2*tile + 1], SOUTH))
+	if tx > 0 and links[tile - 1] >> EAST & 1:
+		found.append((doors[2*(tile - 1)] * tile_size, WEST))
+	if ty > 0 and links[tile - tiles] >> SOUTH & 1:
+		found.append((doors[2*(tile - tiles) + 1], NORTH))
+	return found
+
+class TiledMaze:
+	"""
+	A square maze held as a directory of tile files.
+
+	Implementation Description:
+		Tiles are generated the first time they are used (or all at
+		once by generate_all) and saved with Maze.save. Loaded tiles
+		are memory mapped and kept in an OrderedDict used as an LRU
+		cache, so only cache_tiles tiles are held at any time however
+		large the maze is.
+	"""
+
+	def __init__(self, directory, size, tile_size, algorithm='depth first',
+				 seed=0, cache_tiles=16, **options):
+		"""
+		Initialize TiledMaze, creating directory if it does not exist.
+
+		Args:
+			directory (str) -- Where the tile files are kept.
+			size (int) -- The side length of the whole maze.
+			tile_size (int) -- The side length of each tile; size must be
+			a multiple of it.
+			algorithm (str) -- Key of the tiles' algorithm in ALGORITHMS
+			(default: 'depth first').
+			seed (int) -- The non-negative seed of the maze, below 2**32
+			for all but huge numbers of tiles (default: 0).
+			cache_tiles (int) -- The most tiles kept loaded (default: 16).
+			options -- Extra keyword arguments for the algorithm's
+			generate().
+		"""
+		if algorithm not in ALGORITHMS:
+			raise KeyError("Algorithm: " + str(algorithm) + " not recognized.")
+		if tile_size <= 0 or size % tile_size:
+			raise ValueError("size must be a multiple of tile_size")
+		if seed < 0:
+			raise ValueError("seed must not be negative")
+		count = (size // tile_size)**2
+		# Every tile file stores its seed, and the plan uses the next one.
+		if maze_seed(seed, count) >= MAZE_FILE_SEED_LIMIT:
+			raise ValueError("seed is too large for the tile files")
+
+		self.directory = directory
+		self.size = size
+		self.tile_size = tile_size
+		self.algorithm = algorithm
+		self.seed = seed
+		self.options = options
+		self.cache_tiles = max(1, cache_tiles)
+		self.cache = OrderedDict() # (tx, ty) -> Maze, least recent first.
+
+		self.tiles = size // tile_size
+		# Tiles use seeds 0 to count - 1 of the series; the plan the next.
+		self.links, self.doors = plan_stitches(self.tiles, tile_size,
+											   maze_seed(seed, count))
+
+		index = {'size': size, 'tile_size': tile_size, 'algorithm': algorithm,
+				 'seed': seed, 'options': options}
+		path = os.path.join(directory, TILE_INDEX)
+		if os.path.exists(path):
+			with open(path) as file:
+				if json.load(file) != index:
+					raise ValueError(str(directory)
+									 + " holds a different tiled maze")
+		else:
+			os.makedirs(directory, exist_ok=True)
+			with open(path, 'w') as file:
+				json.dump(index, file)
+
+	@classmethod
+	def open(cls, directory, cache_tiles=16):
+		"""
+		Open a tiled maze that was created in directory before.
+
+		Returns:
+			TiledMaze with the parameters saved in the directory.
+		"""
+		with open(os.path.join(directory, TILE_INDEX)) as file:
+			index = json.load(file)
+		return cls(directory, index['size'], index['tile_size'],
+				   index['algorithm'], index['seed'], cache_tiles,
+				   **index['options'])
+
+	def __len__(self):
+		"""Return the side length of the maze."""
+		return self.size
+
+	def __repr__(self):
+		"""Return a representation of the maze."""
+		return ('TiledMaze Object with side length ' + str(self.size)
+				+ ' in tiles of ' + str(self.tile_size))
+
+	def tile_path(self, tx, ty):
+		"""Return the file of the tile at (tx, ty)."""
+		return os.path.join(self.directory,
+							'tile_' + str(ty) + '_' + str(tx) + '.maze')
+
+	def generate_tile(self, tx, ty):
+		"""
+		Generate the tile at (tx, ty), open its doors and save it.
+
+		Returns:
+			The tile's Maze.
+		"""
+		tile = ALGORITHMS[self.algorithm].generate(
+			Maze(self.tile_size),
+			seed=maze_seed(self.seed, ty * self.tiles + tx), **self.options)
+		for cell, direction in tile_doors(self.links, self.doors, self.tiles,
+										  self.tile_size, tx, ty):
+			tile.set_wall(cell, direction, False)
+		tile.save(self.tile_path(tx, ty))
+		return tile
+
+	def generate_all(self):
+		"""Generate every tile that is not on disk yet."""
+		for ty in range(self.tiles):
+			for tx in range(self.tiles):
+				if not os.path.exists(self.tile_path(tx, ty)):
+					self.generate_tile(tx, ty)
+
+	def tile(self, tx, ty):
+		"""
+		Get the tile at (tx, ty), loading or generating it if it is not
+		in the cache, and evicting the least recently used tile if the
+		cache is full.
+
+		Returns:
+			The tile's Maze.
+		"""
+		key = (tx, ty)
+		cache = self.cache
+		tile = cache.get(key)
+		if tile is not None:
+			cache.move_to_end(key)
+			return tile
+
+		path = self.tile_path(tx, ty)
+		if os.path.exists(path):
+			tile = Maze.load(path)
+		else:
+			tile = self.generate_tile(tx, ty)
+
+		cache[key] = tile
+		if len(cache) > self.cache_tiles:
+			cache.popitem(last=False)
+		return tile
+
+	def locate(self, x, y):
+		"""
+		Find the cell at (x, y) of the whole maze.
+
+		Returns:
+			(Maze, int) of the tile holding the cell and the cell's index
+			in the tile.
+		"""
+		tile_size = self.tile_size
+		tx, local_x = divmod(x, tile_size)
+		ty, local_y = divmod(y, tile_size)
+		return self.tile(tx, ty), local_y * tile_size + local_x
+
+	def has_wall(self, x, y, direction):
+		"""
+		Determine whether or not a border of the cell at (x, y) is a wall.
+
+		Args:
+			x, y (int) -- The cell's position in the whole maze.
+			direction (int) -- One of NORTH, SOUTH, WEST or EAST.
+
+		Returns:
+			bool indicating the presence of a wall.
+		"""
+		tile, cell = self.locate(x, y)
+		return tile.has_wall(cell, direction)
+
+	def open_directions(self, x, y):
+		"""
+		Determine which ways the cell at (x, y) leads to its neighbors,
+		doors between tiles included.
+
+		Returns:
+			int with bit d set for each direction d without a wall.
+		"""
+		tile, cell = self.locate(x, y)
+		mask = tile.open_directions(cell)
+
+		# A tile's mask stops at its own border, so check for doors.
+		last = self.tile_size - 1
+		local_x = x % self.tile_size
+		local_y = y % self.tile_size
+		for direction, edge in ((NORTH, local_y == 0), (SOUTH, local_y == last),
+								(WEST, local_x == 0), (EAST, local_x == last)):
+			if not edge or not 0 <= x + DX[direction] < self.size \
+			   or not 0 <= y + DY[direction] < self.size:
+				continue
+			if not tile.has_wall(cell, direction):
+				mask |= 1 << direction
+		return mask
+
+	def __str__(self):
+		"""Return a string representation of the maze."""
+		text = StringIO()
+		self.write_text(text)
+		return text.getvalue()
+
+	def write_text(self, file, block_rows=64):
+		"""
+		Write the maze in the same text format as Maze.__str__, one row
+		of tiles at a time.
+
+		Args:
+			file -- Any object with a write(str) method.
+			block_rows (int) -- How many rows of column walls are
+			gathered at a time (default: 64).
+		"""
+		tile_size = self.tile_size
+
+		for ty in range(self.tiles):
+			row = [self.tile(tx, ty) for tx in range(self.tiles)]
+
+			for top in range(0, tile_size, block_rows):
+				rows = min(block_rows, tile_size - top)
+				# Neighboring tiles share a border, so only the last tile
+				# of the row adds its east wall column.
+				blocks = [''.join([
+					bit_string(tile.columns.read_bits(x * tile_size + top,
+													  rows), rows)
+					for x in range(tile_size + (tile is row[-1]))])
+					for tile in row]
+
+				for i in range(top, top + rows):
+					file.write(render_slab_line(''.join(
+						bit_string(tile.slabs.read_bits(i * tile_size,
+														tile_size), tile_size)
+						for tile in row)))
+					file.write('\n')
+					file.write(render_column_line(''.join(
+						block[i - top::rows] for block in blocks)))
+					file.write('\n')
+
+		row = [self.tile(tx, self.tiles - 1) for tx in range(self.tiles)]
+		file.write(render_slab_line(''.join(
+			bit_string(tile.slabs.read_bits(tile_size * tile_size, tile_size),
+					   tile_size) for tile in row)))
+		file.write('\n')
@@ -2,9 +2,13 @@
 import tkinter as tk
 import tkinter.font as tkFont
 import sys
+import base64
+import queue
+import threading
 from random import random, choice
-from time import sleep
+from time import perf_counter
 from MazeGenerators import *
+import MazeRaster
 
 #Graphics options.
 ##########
@@ -15,6 +19,8 @@ offset = 0 # Allows for a rim of blankness around the maze.
 default_color = 'black'
 blank_color = 'white'
 line_width = 5
+raster_rendering_on = True # Draw finished mazes as one image, not lines.
+image_animation_on = True # Animate by painting one image, not adding items.
 ##########
 
 #UI options.
@@ -23,6 +29,8 @@ maze_size_entry_on = True
 generate_and_animate_button_on = True
 algo_select_on = True
 animation_speed_entry_on = True
+cancel_button_on = True
+progress_label_on = True
 button_width = 24
 button_height = 1
 ##########
@@ -32,10 +40,19 @@ button_height = 1
 max_size = 1000
 default_animation_speed = 1000
 default_maze_side_length = 200
-algorithm_options = [ # be careful with how these are spelled.
+generation_batch_size = 4096 # moves per step_many call when not animating.
+frame_budget = 16 # milliseconds between animation frames.
+max_frame_lag = 0.25 # seconds of moves a slow frame may catch up on.
+move_queue_size = 64 # batches of moves the generation thread may run ahead.
+algorithm_options = [ # must match the keys of ALGORITHMS.
 "depth first",
 "binary tree",
-"prims algorithm"
+"prims algorithm",
+"kruskals algorithm",
+"ellers algorithm",
+"wilsons algorithm",
+"aldous broder",
+"growing tree"
 ]
 ##########
 
@@ -111,6 +128,73 @@ def create_dropdown_menu(master, f, label_text, options):
 	item_count += 1
 	return menu, var, label
 
+def create_label(master, f, t):
+	"""
+	Create a label spanning both columns.
+
+	Args:
+		f (tkFont.Font) -- The desired font for the label.
+		t (str) -- The starting text for the label.
+
+	Returns:
+		tk.Label that has the desired properties.
+	"""
+	global item_count
+	label = tk.Label(master, font=f, text=t)
+	label.config(height=button_height)
+	label.grid(row=item_count, column=0, columnspan=2)
+	item_count += 1
+	return label
+
+class GenerationThread(threading.Thread):
+	"""
+	Runs a maze generation algorithm in the background.
+
+	Implementation Description:
+		Moves are handed to the GUI in step_many batches through a
+		bounded queue.Queue, followed by None once the maze is
+		finished. When the queue is full the thread waits, so it never
+		runs more than move_queue_size batches ahead of the GUI.
+	"""
+
+	def __init__(self, algorithm):
+		"""
+		Initialize GenerationThread.
+
+		Args:
+			algorithm (MGAlgorithm) -- The algorithm to run.
+		"""
+		super().__init__(daemon=True)
+		self.algorithm = algorithm
+		self.moves = queue.Queue(maxsize=move_queue_size)
+		self.cancelled = threading.Event()
+
+	def run(self):
+		"""Generate the maze, queueing its moves as they are made."""
+		for moves in self.algorithm.iter_chunks(generation_batch_size):
+			if not self.hand_over(moves):
+				return
+		self.hand_over(None)
+
+	def hand_over(self, item):
+		"""
+		Put item on the queue, waiting for room unless cancelled.
+
+		Returns:
+			bool indicating whether or not the item was queued.
+		"""
+		while not self.cancelled.is_set():
+			try:
+				self.moves.put(item, timeout=0.1)
+				return True
+			except queue.Full:
+				pass
+		return False
+
+	def cancel(self):
+		"""Ask the thread to stop as soon as it can."""
+		self.cancelled.set()
+
 class App:
 	"""Main application class."""
 
@@ -161,40 +245,68 @@ class App:
 				'Generate maze (animated)',
 				self.generate_and_animate_maze)
 
+		if cancel_button_on:
+			self.cancel_button = Button(self.frame, self.default_font,
+										'Cancel generation',
+										self.cancel_generation)
+
+		if progress_label_on:
+			self.progress_label = create_label(self.frame,
+											   self.default_font, '')
+
 		self.maze = None
+		self.worker = None # The GenerationThread being shown, if any.
 
 	def draw_whole_maze(self):
-		"""Draws entire maze in one go."""
+		"""
+		Draws entire maze in one go. Runs of touching walls are drawn
+		as one line each, which keeps the number of canvas items down.
+		"""
 		self.drawing.create_rectangle(offset,offset,
 									  window_width+offset,
 									  window_height+offset,
 									  fill=blank_color)
 
+		if len(self.maze) == 0:
+			return
+		cell_length = maze_length / len(self.maze)
+
 		for i in range(len(self.maze.slabs)):
-			for j in range(len(self.maze.slabs[i])):
-				if self.maze.slabs[i][j]:
-					x_i = j / len(self.maze) * maze_length + offset
-					x_f = (j+1) / len(self.maze) * maze_length + offset
-					y_i = i / len(self.maze) * maze_length + offset
-					y_f = y_i
-					self.drawing.create_line(x_i,y_i, x_f,y_f,
-											 fill=default_color,
-											 width=3)
+			y = i * cell_length + offset
+			for start, stop in self.maze.slabs.wall_runs(i):
+				self.drawing.create_line(start * cell_length + offset, y,
+										 stop * cell_length + offset, y,
+										 fill=default_color, width=3)
 
 		for i in range(len(self.maze.columns)):
-			for j in range(len(self.maze.columns[i])):
-				if self.maze.columns[i][j]:
-					x_i = i / len(self.maze)  * maze_length + offset
-					x_f = x_i
-					y_i = j / len(self.maze) * maze_length + offset
-					y_f = (j+1) / len(self.maze) * maze_length + offset
-					self.drawing.create_line(x_i,y_i, x_f,y_f,
-											 fill=default_color,
-											 width=3)
+			x = i * cell_length + offset
+			for start, stop in self.maze.columns.wall_runs(i):
+				self.drawing.create_line(x, start * cell_length + offset,
+										 x, stop * cell_length + offset,
+										 fill=default_color, width=3)
 
 
+	def draw_whole_maze_raster(self):
+		"""
+		Draws entire maze into a pixel buffer and shows it as a single
+		image, so the canvas holds one item whatever the maze size.
+		"""
+		size = max(len(self.maze), 1)
+		cell_pixels = max(1, maze_length // size)
+		raster = MazeRaster.render_maze(
+			self.maze, cell_pixels, wall_pixels=max(1, min(3, cell_pixels // 2)),
+			wall_color=MazeRaster.black, blank_color=MazeRaster.white)
+
+		# Tk only shows the image while a reference to it is kept.
+		self.maze_image = tk.PhotoImage(
+			data=base64.b64encode(raster.to_ppm()))
+		self.drawing.create_image(offset, offset, image=self.maze_image,
+								  anchor='nw')
+
 	def generate_and_animate_maze(self):
 		"""Generates and animates maze in real time."""
+		self.cancel_generation()
+
 		# limit maze size.
 		maze_size = int(self.maze_size_entry.get()) % max_size
 		self.maze = Maze(maze_size) # build a default maze.
@@ -203,50 +315,174 @@ class App:
 			speed = int(self.animation_speed_entry.get())
 		except ValueError:
 			speed = default_animation_speed
-
-		if speed == 0:
-			sleep_time = 0
-		else:
-			sleep_time = 1 / speed
+		if speed < 0:
+			speed = default_animation_speed # Treated like a typo as well.
 
 		animating = not speed == 0
 
-		algorithm = None
-
 		text = self.selected_algo.get().lower()
-		if text == 'depth first':
-			algorithm = DepthFirstMazeGenerator(self.maze)
-		elif text == 'binary tree':
-			algorithm = BinaryTreeMazeGenerator(self.maze)
-		elif text == 'prims algorithm':
-			algorithm = PrimsAlgorithmMazeGenerator(self.maze)
+		algorithm = ALGORITHMS[text](self.maze)
 
 		self.maze_window, self.drawing = make_maze_display(self.frame)
 
-		move = algorithm.step()
+		if animating and image_animation_on:
+			self.start_animation_image()
+
+		worker = GenerationThread(algorithm)
+		worker.start()
+		self.animate(worker, speed)
 
-		while move is not None:
-			if animating:
-				self.draw_move(move)
-			move = algorithm.step()
-			if animating:
-				pause(self.root, sleep_time)
+	def cancel_generation(self):
+		"""Stop the maze that is being generated, if there is one."""
+		if self.worker is None:
+			return
+		self.worker.cancel()
+		self.worker = None
+		self.show_progress('Cancelled')
 
-		if not animating:
-			self.draw_whole_maze()
+	def show_progress(self, text):
+		"""Show text on the progress label, if there is one."""
+		if progress_label_on:
+			self.progress_label.config(text=text)
 
-	def draw_move(self, move):
+	def animate(self, worker, speed):
 		"""
-		Draw a move on a drawing.
+		Start showing a worker's moves from the Tk event loop.
 
 		Args:
-			move (Edge) -- The edge to be drawn
-			drawing (tk.Toplevel) -- The canvas to be drawn on.
+			worker (GenerationThread) -- The thread generating the maze.
+			speed (int) -- How many squares to draw per second, or 0 to
+			draw the maze once it is finished.
+		"""
+		# Replacing self.worker stops the frames of any earlier run.
+		self.worker = worker
+		self.animation_speed = speed
+		self.moves_owed = 0.0
+		self.moves_done = 0
+		self.moves_total = max(len(self.maze) ** 2 - 1, 0)
+		# The starting square is visited without a move.
+		self.first_square = min(len(self.maze), 1)
+		self.pending = []
+		self.pending_index = 0
+		self.last_frame = perf_counter()
+		self.root.after(0, self.animation_frame, worker)
+
+	def animation_frame(self, worker):
 		"""
-		clear_out_cell(move.first, len(self.maze), self.drawing)
-		remove_wall(move.first, move.get_direction(), len(self.maze),
-					self.drawing)
-		clear_out_cell(move.second, len(self.maze), self.drawing)
+		Draw however many moves are due since the last frame and
+		schedule the next frame. Tk redraws the canvas once the frame
+		returns, so all of a frame's moves show up together.
+
+		Args:
+			worker (GenerationThread) -- The run this frame belongs to;
+			frames of a cancelled or replaced run do nothing.
+		"""
+		if worker is not self.worker:
+			return
+
+		animating = self.animation_speed != 0
+		if animating:
+			now = perf_counter()
+			self.moves_owed = min(
+				self.moves_owed + (now - self.last_frame) * self.animation_speed,
+				max_frame_lag * self.animation_speed)
+			self.last_frame = now
+			count = int(self.moves_owed)
+		else:
+			count = self.moves_total + 1 # Take whatever is ready.
+
+		taken, finished = self.take_moves(worker, count, animating)
+		self.moves_done += taken
+		if animating:
+			self.moves_owed -= taken
+
+		if finished:
+			self.worker = None
+			if not animating:
+				if raster_rendering_on:
+					self.draw_whole_maze_raster()
+				else:
+					self.draw_whole_maze()
+			self.show_progress('Done: {} squares'.format(
+				self.moves_done + self.first_square))
+			return
+
+		self.show_progress('Generating: {} / {} squares'.format(
+			self.moves_done + self.first_square, len(self.maze) ** 2))
+		self.root.after(frame_budget, self.animation_frame, worker)
+
+	def take_moves(self, worker, count, drawing):
+		"""
+		Take up to count moves from the worker without waiting.
+
+		Args:
+			worker (GenerationThread) -- The thread generating the maze.
+			count (int) -- The most moves to take.
+			drawing (bool) -- Whether or not to draw the moves taken.
+
+		Returns:
+			(int, bool) of the number of moves taken and whether or not
+			the maze is finished.
+		"""
+		taken = 0
+		while taken < count:
+			if self.pending_index >= len(self.pending):
+				try:
+					batch = worker.moves.get_nowait()
+				except queue.Empty:
+					return taken, False
+				if batch is None:
+					return taken, True
+				self.pending = batch
+				self.pending_index = 0
+
+			start = self.pending_index
+			stop = min(len(self.pending), start + 2 * (count - taken))
+			if drawing:
+				moves = self.pending
+				for i in range(start, stop, 2):
+					self.draw_cell_move(moves[i], moves[i+1])
+			self.pending_index = stop
+			taken += (stop - start) // 2
+
+		return taken, False
+
+	def start_animation_image(self):
+		"""
+		Cover the canvas with one image for the animation to paint
+		into, so the number of canvas items stays the same however
+		many moves are drawn.
+		"""
+		self.animation_image = tk.PhotoImage(width=window_width,
+											 height=window_height)
+		self.animation_image.put(default_color,
+								 to=(0, 0, window_width, window_height))
+		self.drawing.create_image(offset, offset,
+								  image=self.animation_image, anchor='nw')
+
+	def draw_cell_move(self, cell, direction):
+		"""
+		Draw a move given as a cell index and direction.
+
+		Args:
+			cell (int) -- Flat index of the cell the move starts from.
+			direction (int) -- The direction of the move.
+		"""
+		size = len(self.maze)
+		y, x = divmod(cell, size)
+		second = (x + DX[direction], y + DY[direction])
+		letter = DIRECTION_LETTERS[direction]
+
+		if not image_animation_on:
+			clear_out_cell((x, y), size, self.drawing)
+			remove_wall((x, y), letter, size, self.drawing)
+			clear_out_cell(second, size, self.drawing)
+			return
+
+		image = self.animation_image
+		paint_rect(image, cell_rect((x, y), size), blank_color)
+		paint_rect(image, wall_rect((x, y), letter, size), blank_color)
+		paint_rect(image, cell_rect(second, size), blank_color)
 
 
 def make_maze_display(frame):
@@ -278,14 +514,16 @@ def make_maze_display(frame):
 
 	return maze_window, drawing
 
-def clear_out_cell(position, size, drawing):
+def cell_rect(position, size):
 	"""
-	Draws out a square in the desired position on the drawing.
+	Compute the drawing coordinates of the inside of a cell.
 
 	Args:
-		position (Node) -- Indicates cell to be drawn out.
-		size (int) -- The pixel side length of the maze.
-		drawing (tk.Canvas) -- The object to be drawn upon.
+		position (Node) -- Indicates the cell.
+		size (int) -- The side length of the maze in cells.
+
+	Returns:
+		(x_i, y_i, x_f, y_f) of the rectangle.
 	"""
 	x = position[0]
 	y = position[1]
@@ -296,56 +534,78 @@ def clear_out_cell(position, size, drawing):
 	y_i = (y / size) * maze_length + (line_width / 2) + offset
 	y_f = ((y+1) / size) * maze_length - (line_width / 2) + offset
 
-	drawing.create_rectangle(x_i,y_i, x_f,y_f, fill=blank_color,
-							 outline=blank_color)
+	return x_i, y_i, x_f, y_f
 
-def remove_wall(position, move, size, drawing): # TODO: change to Edge?
+def wall_rect(position, move, size):
 	"""
-	Removes a wall in the desired location on a drawing.
+	Compute the drawing coordinates of the wall on one side of a cell.
 
 	Args:
-		position (Edge) -- Indicates central cell for the wall.
+		position (Node) -- Indicates central cell for the wall.
 		move (str) -- Indicate the direction in which the wall is.
-		size (int) -- The pixel side length of the maze.
-		drawing (tk.Canvas) -- The object to be drawn upon.
+		size (int) -- The side length of the maze in cells.
+
+	Returns:
+		(x_i, y_i, x_f, y_f) of the rectangle covering the wall.
 	"""
 	x = position[0]
 	y = position[1]
+	line_crawl = line_width / 2
+
+	if move == 'S': return wall_rect((x,y+1), 'N', size)
+	if move == 'E': return wall_rect((x+1,y), 'W', size)
+
 	if move == 'N':
-		line_crawl = line_width / 2
 		x_i = (x / size) * maze_length + line_crawl + offset
 		x_f = ((x+1) / size) * maze_length - line_crawl + offset + 1
 
 		y_i = (y / size) * maze_length + offset
-		y_f = y_i
-		drawing.create_line(x_i,y_i, x_f,y_f, fill=blank_color,
-							width=line_width)
+		return x_i, y_i - line_crawl, x_f, y_i + line_crawl
 
-	if move == 'S': remove_wall((x,y+1), 'N', size, drawing)
+	x_i = x / size  * maze_length + offset
 
-	if move == 'W':
-		line_crawl = line_width / 2
+	y_i = (y / size) * maze_length + line_crawl + offset
+	y_f = ((y+1) / size) * maze_length - line_crawl + 1 + offset
+	return x_i - line_crawl, y_i, x_i + line_crawl, y_f
 
-		x_i = x / size  * maze_length + offset
-		x_f = x_i
+def clear_out_cell(position, size, drawing):
+	"""
+	Draws out a square in the desired position on the drawing.
 
-		y_i = (y / size) * maze_length + line_crawl + offset
-		y_f = ((y+1) / size) * maze_length - line_crawl + 1 + offset
-		drawing.create_line(x_i,y_i, x_f,y_f, fill=blank_color,
-							width=line_width)
+	Args:
+		position (Node) -- Indicates cell to be drawn out.
+		size (int) -- The pixel side length of the maze.
+		drawing (tk.Canvas) -- The object to be drawn upon.
+	"""
+	drawing.create_rectangle(*cell_rect(position, size), fill=blank_color,
+							 outline=blank_color)
 
-	if move == 'E': remove_wall((x+1,y), 'W', size, drawing)
+def remove_wall(position, move, size, drawing):
+	"""
+	Removes a wall in the desired location on a drawing.
+
+	Args:
+		position (Edge) -- Indicates central cell for the wall.
+		move (str) -- Indicate the direction in which the wall is.
+		size (int) -- The pixel side length of the maze.
+		drawing (tk.Canvas) -- The object to be drawn upon.
+	"""
+	drawing.create_rectangle(*wall_rect(position, move, size),
+							 fill=blank_color, outline=blank_color)
 
-def pause(root, t):
+def paint_rect(image, rect, color):
 	"""
-	Pause the app for t seconds.
+	Paint a rectangle given in drawing coordinates onto an image
+	that is placed at (offset, offset).
 
 	Args:
-		root (tk.Tk) -- The root of the application.
-		t (int) -- The amount of time to sleep for.
+		image (tk.PhotoImage) -- The image to be painted on.
+		rect ((float, float, float, float)) -- x_i, y_i, x_f, y_f.
+		color (str) -- The color to paint.
 	"""
-	root.update()
-	sleep(t)
+	x_i, y_i, x_f, y_f = (round(value - offset) for value in rect)
+	if x_f > x_i and y_f > y_i:
+		image.put(color, to=(x_i, y_i, x_f, y_f))
 
 def main():
 	"""main function for the app."""
@@ -0,0 +1,85 @@
+"""
+Benchmark of every maze generation algorithm in ALGORITHMS.
+
+Run from the repository root with: python -m benchmarks.bench_generators
+"""
+import sys
+import tracemalloc
+from time import perf_counter
+
+from MazeGenerators import Maze, ALGORITHMS
+
+DEFAULT_SIZES = (100, 500, 1000, 2000, 5000)
+
+def generate(name, size, seed=0):
+	"""Build a maze of side size with the algorithm called name."""
+	ALGORITHMS[name].generate(Maze(size), seed=seed)
+
+def time_generate(name, size):
+	"""Return the wall clock time of one generate call, in seconds."""
+	start = perf_counter()
+	generate(name, size)
+	return perf_counter() - start
+
+def peak_memory(function, *args):
+	"""Return the most bytes traced by tracemalloc while function ran."""
+	tracemalloc.start()
+	try:
+		function(*args)
+		return tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+def measure(name, sizes=DEFAULT_SIZES, budget=60.0, memory=True):
+	"""
+	Time one algorithm over growing maze sizes.
+
+	The time of each size is estimated from the last one, and sizes
+	expected to take longer than budget are skipped, so slow algorithms
+	such as Aldous-Broder do not hold up the run.
+
+	Args:
+		name (str) -- Key of the algorithm in ALGORITHMS.
+		sizes (tuple) -- Side lengths, smallest first.
+		budget (float) -- The most seconds to spend on one size.
+		memory (bool) -- Whether to make a second, traced run to find
+		the peak memory (default: True).
+
+	Returns:
+		list of dicts with the size, seconds, cells_per_second and
+		peak_bytes of each size, or the size and skipped=True.
+	"""
+	results = []
+	last_size = last_seconds = None
+	for size in sizes:
+		if last_size and last_seconds * (size / last_size)**2 > budget:
+			results.append({'size': size, 'skipped': True})
+			continue
+
+		seconds = time_generate(name, size)
+		if seconds < 1.0: # Quick runs are noisy; keep the best of three.
+			seconds = min(seconds, time_generate(name, size),
+						  time_generate(name, size))
+		last_size, last_seconds = size, seconds
+
+		result = {'size': size, 'seconds': seconds,
+				  'cells_per_second': size * size / seconds}
+		if memory:
+			result['peak_bytes'] = peak_memory(generate, name, size)
+		results.append(result)
+	return results
+
+def main(sizes=DEFAULT_SIZES):
+	"""Print the throughput and peak memory of every algorithm."""
+	for name in ALGORITHMS:
+		for result in measure(name, sizes):
+			if result.get('skipped'):
+				print('{:>6}  {:<20} skipped'.format(result['size'], name))
+				continue
+			print('{:>6}  {:<20} {:8.3f} s  {:>12,.0f} cells/s  {:>8.1f} MiB'
+				  .format(result['size'], name, result['seconds'],
+						  result['cells_per_second'],
+						  result['peak_bytes'] / 2**20))
+
+if __name__ == '__main__':
+	main(tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES)
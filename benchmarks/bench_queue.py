@@ -0,0 +1,148 @@
+"""
+Microbenchmark for the priority queues used by Prim's algorithm.
+
+Run from the repository root with: python -m benchmarks.bench_queue
+"""
+import heapq
+import sys
+from random import Random
+from time import perf_counter
+
+from MazeGenerators import PriorityQueue, IndexedHeap, Edge, Node
+
+class BaselinePriorityQueue:
+	"""
+	PriorityQueue as it was before the iterative rewrite, kept here to
+	measure the rewrite against. get_min removes the root with
+	list.pop and refills it with list.insert, both O(n), and percolates
+	recursively. It also compares the wrong child when percolating
+	down, so it does not always pop in order; only its speed matters.
+	"""
+
+	def __init__(self):
+		self.queue = [None]
+
+	def insert(self, item):
+		if type(item) is not list:
+			self.insert([item])
+			return
+		for element in item:
+			self.queue.append(element)
+			self.percolate_up(len(self))
+
+	def pop(self, index):
+		result = self.queue.pop(index+1)
+		if len(self) - index > 1:
+			self.queue.insert(index+1, self.queue.pop(len(self)))
+			self.percolate_down(index+1)
+
+		return result
+
+	def __len__(self):
+		return len(self.queue) - 1
+
+	def get_min(self):
+		return self.pop(0)
+
+	def percolate_up(self, index):
+		if index == 1:
+			return
+
+		current = self.queue[index]
+		parent = self.queue[index // 2]
+		if current < parent:
+			temp = current
+			self.queue[index] = parent
+			self.queue[index // 2] = temp
+			self.percolate_up(index // 2)
+
+	def percolate_down(self, index):
+		current = self.queue[index]
+
+		if index > len(self) / 2:
+			return
+
+		child = index * 2
+		if index * 2 + 1 < len(self):
+			challenger = index * 2 + 1
+			if self.queue[child] < self.queue[challenger]:
+				child = challenger
+
+		if self.queue[child] < current:
+			temp = current
+			self.queue[index] = self.queue[child]
+			self.queue[child] = temp
+			self.percolate_down(child)
+
+def make_workload(count, seed=0):
+	"""
+	Build a list of (cell, weight) pairs to push through a queue.
+
+	Args:
+		count (int) -- The number of pairs.
+		seed (int) -- Seed for the weights (default: 0).
+
+	Returns:
+		list of (int, int) with cells in range(count).
+	"""
+	rng = Random(seed)
+	return [(cell, rng.randint(1, 1000)) for cell in range(count)]
+
+def bench_priority_queue(workload, queue_class=PriorityQueue):
+	"""Push Edges through PriorityQueue and pop them all."""
+	origin = Node(0, 0)
+	queue = queue_class()
+	queue.insert([Edge(origin, Node(cell, 0), weight)
+				  for cell, weight in workload])
+	while len(queue):
+		queue.get_min()
+
+def bench_baseline_queue(workload):
+	"""Push Edges through BaselinePriorityQueue and pop them all."""
+	bench_priority_queue(workload, BaselinePriorityQueue)
+
+def bench_indexed_heap(workload):
+	"""Push cells through IndexedHeap and pop them all."""
+	heap = IndexedHeap(len(workload))
+	for cell, weight in workload:
+		heap.push(cell, weight)
+	while len(heap):
+		heap.pop()
+
+def bench_heapq(workload):
+	"""Push (weight, cell) tuples through heapq as a baseline."""
+	heap = []
+	for cell, weight in workload:
+		heapq.heappush(heap, (weight, cell))
+	while heap:
+		heapq.heappop(heap)
+
+benchmarks = {
+	'baseline': bench_baseline_queue,
+	'PriorityQueue': bench_priority_queue,
+	'IndexedHeap': bench_indexed_heap,
+	'heapq': bench_heapq,
+}
+
+def time_call(function, workload, repeat=3):
+	"""Return the best wall clock time of repeat calls, in seconds."""
+	best = None
+	for i in range(repeat):
+		start = perf_counter()
+		function(workload)
+		elapsed = perf_counter() - start
+		if best is None or elapsed < best:
+			best = elapsed
+	return best
+
+def main(sizes=(1000, 10000, 100000)):
+	"""Print push+pop throughput of every queue for each size."""
+	for count in sizes:
+		workload = make_workload(count)
+		for name, function in benchmarks.items():
+			elapsed = time_call(function, workload)
+			print('{:>8} items  {:<14} {:8.3f} s  {:>12,.0f} items/s'.format(
+				count, name, elapsed, count / elapsed))
+
+if __name__ == '__main__':
+	main(tuple(int(arg) for arg in sys.argv[1:]) or (1000, 10000, 100000))
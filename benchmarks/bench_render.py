@@ -0,0 +1,118 @@
+"""
+Benchmark of the text, raster and canvas rendering paths.
+
+Run from the repository root with: python -m benchmarks.bench_render
+"""
+from importlib import import_module
+import sys
+
+from MazeGenerators import Maze, DepthFirstMazeGenerator
+from MazeRaster import render_maze
+
+from benchmarks.bench_queue import time_call
+
+DEFAULT_SIZES = (100, 500, 1000)
+
+class CountingCanvas:
+	"""
+	Stands in for a tk.Canvas, so the canvas path can be timed without
+	a display. Only the Python side of drawing is measured.
+	"""
+
+	def __init__(self):
+		self.items = 0
+
+	def create_line(self, *coordinates, **options):
+		self.items += 1
+		return self.items
+
+	create_rectangle = create_line
+
+class CanvasApp:
+	"""Holds the attributes App.draw_whole_maze uses, without a window."""
+
+	def __init__(self, maze):
+		self.maze = maze
+		self.drawing = CountingCanvas()
+
+def bench_text(maze):
+	"""Render the maze with Maze.__str__."""
+	return len(str(maze))
+
+def bench_raster(maze):
+	"""Paint the maze into a Raster with 4 pixel cells."""
+	return len(render_maze(maze, 4).pixels)
+
+def bench_png(maze):
+	"""Paint the maze and encode it as a PNG file."""
+	return len(render_maze(maze, 4).to_png())
+
+def bench_canvas(maze):
+	"""
+	Draw the maze with the app's own App.draw_whole_maze. app.py is
+	imported here, so the other paths run without tkinter.
+
+	Returns:
+		int number of canvas items drawn.
+	"""
+	import app
+
+	stand_in = CanvasApp(maze)
+	app.App.draw_whole_maze(stand_in)
+	return stand_in.drawing.items
+
+benchmarks = {
+	'text': bench_text,
+	'raster': bench_raster,
+	'png': bench_png,
+	'canvas': bench_canvas,
+}
+needs_tkinter = {'canvas'} # Paths that import app.py, and so tkinter.
+
+def has_tkinter():
+	"""Determine whether tkinter can be imported."""
+	try:
+		import_module('tkinter')
+	except ImportError:
+		return False
+	return True
+
+def make_maze(size, seed=0):
+	"""Return a depth first maze to render."""
+	return DepthFirstMazeGenerator.generate(Maze(size), seed=seed)
+
+def measure(sizes=DEFAULT_SIZES):
+	"""
+	Time every render path on a maze of each size.
+
+	Returns:
+		dict of render path name to a list of dicts with the size,
+		seconds and cells_per_second of each size, or the size and
+		skipped=True for paths that need tkinter when it is missing.
+	"""
+	results = {name: [] for name in benchmarks}
+	skip = set() if has_tkinter() else needs_tkinter
+	for size in sizes:
+		maze = make_maze(size)
+		for name, function in benchmarks.items():
+			if name in skip:
+				results[name].append({'size': size, 'skipped': True})
+				continue
+			seconds = time_call(function, maze)
+			results[name].append({'size': size, 'seconds': seconds,
+								  'cells_per_second': size * size / seconds})
+	return results
+
+def main(sizes=DEFAULT_SIZES):
+	"""Print the throughput of every render path for each size."""
+	for name, runs in measure(sizes).items():
+		for result in runs:
+			if result.get('skipped'):
+				print('{:>6}  {:<8} skipped'.format(result['size'], name))
+				continue
+			print('{:>6}  {:<8} {:8.3f} s  {:>12,.0f} cells/s'.format(
+				result['size'], name, result['seconds'],
+				result['cells_per_second']))
+
+if __name__ == '__main__':
+	main(tuple(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES)
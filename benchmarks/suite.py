@@ -0,0 +1,159 @@
+"""
+Run every benchmark and write the results as JSON, so that runs on
+different versions can be compared.
+
+Run from the repository root with: python -m benchmarks.suite --help
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from MazeGenerators import ALGORITHMS, optional_numpy
+
+from benchmarks import bench_generators, bench_queue, bench_render
+
+def environment():
+	"""Describe the machine and version of the code being measured."""
+	try:
+		commit = subprocess.run(['git', 'rev-parse', 'HEAD'],
+								capture_output=True, text=True,
+								check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		commit = None
+	return {
+		'commit': commit,
+		'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'python': platform.python_version(),
+		'implementation': platform.python_implementation(),
+		'platform': platform.platform(),
+		'numpy': optional_numpy() is not None,
+	}
+
+def measure_queues(sizes):
+	"""
+	Time every queue of bench_queue on each workload size.
+
+	Returns:
+		dict of queue name to a list of dicts with the size, seconds and
+		items_per_second of each size.
+	"""
+	results = {name: [] for name in bench_queue.benchmarks}
+	for count in sizes:
+		workload = bench_queue.make_workload(count)
+		for name, function in bench_queue.benchmarks.items():
+			seconds = bench_queue.time_call(function, workload)
+			results[name].append({'size': count, 'seconds': seconds,
+								  'items_per_second': count / seconds})
+	return results
+
+def run(sizes, render_sizes, queue_sizes, budget=60.0, memory=True):
+	"""
+	Run the whole suite.
+
+	Returns:
+		dict of the environment and the results of each benchmark.
+	"""
+	generators = {}
+	for name in ALGORITHMS:
+		print('generating with ' + name, file=sys.stderr)
+		generators[name] = bench_generators.measure(name, sizes, budget,
+													 memory)
+	print('rendering', file=sys.stderr)
+	render = bench_render.measure(render_sizes)
+	print('queueing', file=sys.stderr)
+	queues = measure_queues(queue_sizes)
+
+	return {'environment': environment(), 'generators': generators,
+			'render': render, 'queues': queues}
+
+def rates(results):
+	"""
+	Flatten a suite result into {(group, name, size): rate} for every
+	timed run, the rate being cells or items per second.
+	"""
+	flat = {}
+	for group in ('generators', 'render', 'queues'):
+		for name, runs in results.get(group, {}).items():
+			for result in runs:
+				rate = result.get('cells_per_second',
+								  result.get('items_per_second'))
+				if rate is not None:
+					flat[(group, name, result['size'])] = rate
+	return flat
+
+def compare(old, new, threshold=0.1):
+	"""
+	Print every run that got slower or faster by more than threshold.
+
+	Args:
+		old, new (dict) -- Results returned by run.
+		threshold (float) -- The relative change to report
+		(default: 0.1).
+
+	Returns:
+		int number of runs that got slower.
+	"""
+	old_rates = rates(old)
+	slower = 0
+	for key, rate in sorted(rates(new).items()):
+		if key not in old_rates:
+			continue
+		change = rate / old_rates[key] - 1
+		if abs(change) < threshold:
+			continue
+		slower += change < 0
+		print('{:<10} {:<20} {:>6}  {:+7.1%}'.format(*key, change))
+	return slower
+
+def sizes(text):
+	"""Parse a comma separated list of sizes."""
+	return tuple(int(size) for size in text.split(','))
+
+def main(argv=None):
+	"""main function for the benchmark suite."""
+	parser = argparse.ArgumentParser(
+		description='Benchmark the generators, queues and renderers.')
+	parser.add_argument('--output', default=None,
+						help='JSON file to write the results to '
+							 '(default: stdout)')
+	parser.add_argument('--sizes', type=sizes,
+						default=bench_generators.DEFAULT_SIZES,
+						help='maze sizes for the generators (default: '
+							 '100,500,1000,2000,5000)')
+	parser.add_argument('--render-sizes', type=sizes,
+						default=bench_render.DEFAULT_SIZES,
+						help='maze sizes for rendering (default: 100,500,1000)')
+	parser.add_argument('--queue-sizes', type=sizes,
+						default=(1000, 10000, 100000),
+						help='items pushed through the queues '
+							 '(default: 1000,10000,100000)')
+	parser.add_argument('--budget', type=float, default=60.0,
+						help='skip generator sizes expected to take longer '
+							 'than this many seconds (default: 60)')
+	parser.add_argument('--no-memory', action='store_true',
+						help="don't make the traced runs for peak memory")
+	parser.add_argument('--compare', default=None,
+						help='earlier results to report changes against')
+	args = parser.parse_args(argv)
+
+	results = run(args.sizes, args.render_sizes, args.queue_sizes,
+				  args.budget, not args.no_memory)
+
+	text = json.dumps(results, indent=1)
+	if args.output is None:
+		print(text)
+	else:
+		with open(args.output, 'w') as file:
+			file.write(text + '\n')
+
+	if args.compare is not None:
+		with open(args.compare) as file:
+			old = json.load(file)
+		if compare(old, results):
+			sys.exit(1)
+
+if __name__ == '__main__':
+	main()
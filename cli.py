@@ -0,0 +1,303 @@
+"""
+Command line interface for generating mazes without the GUI.
+
+Run python -m cli --help for usage. Unlike app.py this never imports
+tkinter, so it works on machines without a display, and heavier
+modules are only imported by the commands that need them.
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+output_formats = ('text', 'binary', 'png', 'ppm')
+seed_limit = 2**32 # Matches the random seeds drawn from os.urandom(4).
+
+def algorithm_name(text):
+	"""
+	Turn a command line algorithm name into a key of ALGORITHMS.
+
+	Dashes and underscores may stand in for spaces, so depth-first and
+	'depth first' both work.
+	"""
+	from MazeGenerators import ALGORITHMS
+
+	name = text.lower().replace('-', ' ').replace('_', ' ')
+	if name not in ALGORITHMS:
+		choices = ', '.join(key.replace(' ', '-') for key in ALGORITHMS)
+		raise argparse.ArgumentTypeError(
+			"unknown algorithm '" + text + "' (choose from " + choices + ")")
+	return name
+
+def seed_value(text):
+	"""
+	Parse a seed. Seeds are limited to 32 bits so that every maze_seed
+	derived from them still fits in a maze file.
+	"""
+	seed = int(text)
+	if not 0 <= seed < seed_limit:
+		raise argparse.ArgumentTypeError(
+			'seed must be from 0 to ' + str(seed_limit - 1))
+	return seed
+
+def non_negative(text):
+	"""Parse a size or count, which must not be negative."""
+	value = int(text)
+	if value < 0:
+		raise argparse.ArgumentTypeError('must not be negative')
+	return value
+
+def positive(text):
+	"""Parse a number of tiles, workers or pixels, which must be positive."""
+	value = int(text)
+	if value <= 0:
+		raise argparse.ArgumentTypeError('must be positive')
+	return value
+
+def write_maze(maze, output, index, format='text', cell_pixels=4):
+	"""
+	Write a maze to stdout or to a file in a directory.
+
+	Args:
+		maze (Maze) -- The maze to write.
+		output (str) -- Directory for maze_<index>.<extension>, or
+		None for stdout.
+		index (int) -- The position of the maze in the run.
+		format (str) -- 'text' for the text rendering, 'binary' for a
+		binary maze file, or 'png' or 'ppm' for an image
+		(default: 'text').
+		cell_pixels (int) -- Cell size of images in pixels (default: 4).
+	"""
+	if output is None:
+		if index > 0:
+			sys.stdout.write('\n')
+		maze.write_text(sys.stdout)
+		return
+
+	if format == 'binary':
+		maze.save(os.path.join(output, 'maze_' + str(index) + '.maze'))
+		return
+
+	if format in ('png', 'ppm'):
+		from MazeRaster import render_maze
+
+		path = os.path.join(output, 'maze_' + str(index) + '.' + format)
+		render_maze(maze, cell_pixels).save(path)
+		return
+
+	path = os.path.join(output, 'maze_' + str(index) + '.txt')
+	with open(path, 'w') as file:
+		maze.write_text(file)
+
+def check_output(parser, args):
+	"""Reject option combinations that cannot be written out."""
+	if args.format != 'text' and args.output is None:
+		parser.error('--format ' + args.format + ' needs --output')
+
+def run_generate(args):
+	"""Generate mazes one after the other, reporting each one's time."""
+	from MazeGenerators import Maze, ALGORITHMS, maze_seed
+
+	generator = ALGORITHMS[args.algorithm]
+	base_seed = args.seed
+	if base_seed is None:
+		base_seed = int.from_bytes(os.urandom(4), 'little')
+	if args.output is not None:
+		os.makedirs(args.output, exist_ok=True)
+
+	for index in range(args.count):
+		seed = maze_seed(base_seed, index)
+		start = perf_counter()
+		maze = generator.generate(Maze(args.size), seed=seed)
+		elapsed = perf_counter() - start
+
+		write_maze(maze, args.output, index, args.format, args.cell_pixels)
+		print('maze {}: {} size {} seed {} generated in {:.3f} s'.format(
+			index, args.algorithm, args.size, seed, elapsed),
+			file=sys.stderr)
+
+def run_batch(args):
+	"""Generate a batch of mazes in parallel and write them out."""
+	from MazeBatch import generate_batch
+
+	start = perf_counter()
+	mazes = generate_batch(args.algorithm, args.size, args.count,
+						   base_seed=args.seed, workers=args.workers)
+	elapsed = perf_counter() - start
+
+	if args.output is not None:
+		os.makedirs(args.output, exist_ok=True)
+	for index, maze in enumerate(mazes):
+		write_maze(maze, args.output, index, args.format, args.cell_pixels)
+
+	print('generated {} mazes of side {} in {:.3f} s'.format(
+		len(mazes), args.size, elapsed), file=sys.stderr)
+
+def run_parallel(args):
+	"""Generate one maze in tiles across worker processes and write it out."""
+	from MazeBatch import generate_tiled
+
+	seed = args.seed
+	if seed is None:
+		seed = int.from_bytes(os.urandom(4), 'little')
+	if args.output is not None:
+		os.makedirs(args.output, exist_ok=True)
+
+	start = perf_counter()
+	try:
+		maze = generate_tiled(args.algorithm, args.size, args.tiles, seed,
+							  args.workers)
+	except ValueError as error:
+		sys.exit('error: ' + str(error))
+	elapsed = perf_counter() - start
+
+	write_maze(maze, args.output, 0, args.format, args.cell_pixels)
+	print('maze: {} size {} in {} x {} tiles seed {} generated in {:.3f} s'
+		  .format(args.algorithm, args.size, args.tiles, args.tiles, seed,
+				  elapsed), file=sys.stderr)
+
+def run_stream(args):
+	"""Stream an Eller's maze of any height to stdout or a file, row by row."""
+	from MazeGenerators import eller_rows, write_rows_text
+
+	seed = args.seed
+	if seed is None:
+		seed = int.from_bytes(os.urandom(4), 'little')
+
+	start = perf_counter()
+	rows = eller_rows(args.width, args.height, seed)
+	if args.output is None:
+		write_rows_text(rows, args.width, sys.stdout)
+	else:
+		with open(args.output, 'w') as file:
+			write_rows_text(rows, args.width, file)
+	elapsed = perf_counter() - start
+
+	print('streamed {} x {} maze seed {} in {:.3f} s'.format(
+		args.width, args.height, seed, elapsed), file=sys.stderr)
+
+def run_tiled(args):
+	"""Generate every tile of a tiled maze, then optionally write it out."""
+	from MazeTiles import TiledMaze
+
+	seed = args.seed
+	if seed is None:
+		seed = int.from_bytes(os.urandom(4), 'little')
+
+	start = perf_counter()
+	try:
+		maze = TiledMaze(args.directory, args.size, args.tile_size,
+						 args.algorithm, seed)
+	except ValueError as error:
+		sys.exit('error: ' + str(error))
+	maze.generate_all()
+	elapsed = perf_counter() - start
+	print('generated {} x {} tiles of side {} seed {} in {:.3f} s'.format(
+		maze.tiles, maze.tiles, args.tile_size, seed, elapsed),
+		file=sys.stderr)
+
+	if args.output == '-':
+		maze.write_text(sys.stdout)
+	elif args.output is not None:
+		with open(args.output, 'w') as file:
+			maze.write_text(file)
+
+def build_parser():
+	"""Return the argparse parser for the command line."""
+	parser = argparse.ArgumentParser(
+		description='Generate mazes without the GUI.')
+	commands = parser.add_subparsers(dest='command', required=True)
+
+	generate = commands.add_parser(
+		'generate', help='generate mazes in this process, one at a time')
+	generate.add_argument('algorithm', type=algorithm_name)
+	generate.add_argument('size', type=non_negative)
+	generate.add_argument('--seed', type=seed_value, default=None,
+						  help='base seed below 2**32 (default: random)')
+	generate.add_argument('--count', type=non_negative, default=1,
+						  help='number of mazes to generate (default: 1)')
+	generate.add_argument('--output', default=None,
+						  help='directory to write maze_<n>.txt files to '
+							   '(default: stdout)')
+	generate.add_argument('--format', choices=output_formats,
+						  default='text', help='output format (default: text)')
+	generate.add_argument('--cell-pixels', type=positive, default=4,
+						  help='cell size of png/ppm images (default: 4)')
+	generate.set_defaults(run=run_generate)
+
+	batch = commands.add_parser(
+		'batch', help='generate many mazes across worker processes')
+	batch.add_argument('algorithm', type=algorithm_name)
+	batch.add_argument('size', type=non_negative)
+	batch.add_argument('count', type=non_negative)
+	batch.add_argument('--seed', type=seed_value, default=0,
+					   help='base seed of the batch, below 2**32')
+	batch.add_argument('--workers', type=positive, default=None,
+					   help='number of processes (default: one per CPU)')
+	batch.add_argument('--output', default=None,
+					   help='directory to write maze_<n>.txt files to '
+							'(default: stdout)')
+	batch.add_argument('--format', choices=output_formats,
+					   default='text', help='output format (default: text)')
+	batch.add_argument('--cell-pixels', type=positive, default=4,
+					   help='cell size of png/ppm images (default: 4)')
+	batch.set_defaults(run=run_batch)
+
+	parallel = commands.add_parser(
+		'parallel', help='generate one maze in tiles across worker processes')
+	parallel.add_argument('algorithm', type=algorithm_name)
+	parallel.add_argument('size', type=non_negative)
+	parallel.add_argument('tiles', type=positive,
+						  help='tiles along each side; size must be a '
+							   'multiple of it')
+	parallel.add_argument('--seed', type=seed_value, default=None,
+						  help='seed below 2**32 (default: random)')
+	parallel.add_argument('--workers', type=positive, default=None,
+						  help='number of processes (default: one per CPU)')
+	parallel.add_argument('--output', default=None,
+						  help='directory to write maze_0.txt to '
+							   '(default: stdout)')
+	parallel.add_argument('--format', choices=output_formats,
+						  default='text', help='output format (default: text)')
+	parallel.add_argument('--cell-pixels', type=positive, default=4,
+						  help='cell size of png/ppm images (default: 4)')
+	parallel.set_defaults(run=run_parallel)
+
+	stream = commands.add_parser(
+		'stream', help="write an Eller's maze of any height row by row, "
+					   'in memory proportional to its width')
+	stream.add_argument('width', type=non_negative)
+	stream.add_argument('height', type=non_negative)
+	stream.add_argument('--seed', type=seed_value, default=None,
+						help='seed below 2**32 (default: random)')
+	stream.add_argument('--output', default=None,
+						help='text file to write to (default: stdout)')
+	stream.set_defaults(run=run_stream, format='text')
+
+	tiled = commands.add_parser(
+		'tiled', help='generate a maze as a directory of tile files, for '
+					  'mazes too large to hold in memory')
+	tiled.add_argument('algorithm', type=algorithm_name)
+	tiled.add_argument('size', type=non_negative)
+	tiled.add_argument('tile_size', type=positive,
+					   help='side length of each tile; size must be a '
+							'multiple of it')
+	tiled.add_argument('directory', help='directory for the tile files')
+	tiled.add_argument('--seed', type=seed_value, default=None,
+					   help='seed below 2**32 (default: random)')
+	tiled.add_argument('--output', default=None,
+					   help="text file to write the whole maze to, or - for "
+							"stdout (default: don't write it)")
+	tiled.set_defaults(run=run_tiled, format='text')
+
+	return parser
+
+def main(argv=None):
+	"""main function for the command line."""
+	parser = build_parser()
+	args = parser.parse_args(argv)
+	check_output(parser, args)
+	args.run(args)
+
+if __name__ == '__main__':
+	main()
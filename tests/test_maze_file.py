@@ -0,0 +1,51 @@
+"""Tests of the binary maze file format."""
+import os
+import tempfile
+import unittest
+
+from MazeGenerators import (Maze, KruskalMazeGenerator, MAZE_FILE_SEED_LIMIT,
+							EAST)
+
+class MazeFileTest(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, 'maze.maze')
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_round_trip(self):
+		for seed in (None, 0, MAZE_FILE_SEED_LIMIT - 1):
+			maze = KruskalMazeGenerator.generate(Maze(13), seed=seed)
+			maze.save(self.path)
+			for mmap in (True, False):
+				loaded = Maze.load(self.path, mmap=mmap)
+				self.assertEqual(str(loaded), str(maze))
+				self.assertEqual(loaded.seed, seed)
+				self.assertEqual(loaded.algorithm, 'KruskalMazeGenerator')
+				del loaded
+
+	def test_save_over_loaded_file(self):
+		maze = KruskalMazeGenerator.generate(Maze(300), seed=3)
+		maze.save(self.path)
+		for edit in (False, True):
+			loaded = Maze.load(self.path)
+			if edit:
+				loaded.set_wall(0, EAST, not loaded.has_wall(0, EAST))
+			expected = str(loaded)
+			loaded.save(self.path)
+			self.assertEqual(str(loaded), expected)
+			self.assertEqual(str(Maze.load(self.path, mmap=False)), expected)
+			self.assertEqual(os.listdir(self.directory.name), ['maze.maze'])
+			del loaded
+
+	def test_seed_out_of_range(self):
+		for seed in (-1, MAZE_FILE_SEED_LIMIT):
+			maze = Maze(3)
+			maze.seed = seed
+			with self.assertRaises(ValueError):
+				maze.save(self.path)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,65 @@
+"""Tests that Maze.passage_mask follows every way of writing walls."""
+import unittest
+
+from MazeGenerators import (Maze, ALGORITHMS, NORTH, SOUTH, WEST, EAST,
+							DX, DY)
+
+def expected_mask(maze):
+	"""Read the open directions of every cell one wall at a time."""
+	size = len(maze)
+	mask = bytearray(size * size)
+	for cell in range(size * size):
+		y, x = divmod(cell, size)
+		for direction in (NORTH, SOUTH, WEST, EAST):
+			if not (0 <= x + DX[direction] < size
+					and 0 <= y + DY[direction] < size):
+				continue
+			if not maze.has_wall(cell, direction):
+				mask[cell] |= 1 << direction
+	return mask
+
+class PassageMaskTest(unittest.TestCase):
+
+	def test_set_wall_keeps_mask(self):
+		maze = Maze(4)
+		maze.passage_mask()
+		maze[1, 1, 'E'] = True
+		maze.set_wall(5, SOUTH, True)
+		maze[0, 0, 'N'] = False
+		self.assertEqual(maze.passage_mask(), expected_mask(maze))
+
+	def test_plane_writes_refresh_mask(self):
+		writes = (
+			lambda maze: maze.slabs[1].__setitem__(0, True),
+			lambda maze: maze.columns.__setitem__(2, True),
+			lambda maze: maze.columns.fill_row(1, True),
+			lambda maze: maze.slabs.write_bits(5, 3, 0b101),
+			lambda maze: maze.slabs.set_range(4, 12, True),
+		)
+		for write in writes:
+			maze = Maze(4)
+			maze.passage_mask()
+			write(maze)
+			self.assertEqual(maze.passage_mask(), expected_mask(maze))
+			# set_wall after a stale mask must not patch the stale copy.
+			maze.set_wall(0, EAST, True)
+			self.assertEqual(maze.passage_mask(), expected_mask(maze))
+
+	def test_generators(self):
+		for name, generator in ALGORITHMS.items():
+			maze = Maze(9)
+			maze.passage_mask()
+			generator.generate(maze, seed=1)
+			self.assertEqual(maze.passage_mask(), expected_mask(maze), name)
+
+			maze = Maze(9)
+			algorithm = generator(maze, seed=1)
+			maze.passage_mask()
+			for move in algorithm:
+				pass
+			self.assertEqual(maze.passage_mask(), expected_mask(maze), name)
+			self.assertEqual(maze.open_directions(40),
+							 expected_mask(maze)[40], name)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,136 @@
+"""Tests of the bit-packed wall storage against a list of bools."""
+from random import Random
+import unittest
+
+from MazeGenerators import Maze, WallPlane
+
+class ReferencePlane:
+	"""The nested lists of bools that WallPlane replaced."""
+
+	def __init__(self, rows, length, value=False):
+		self.length = length
+		self.walls = [[value] * length for row in range(rows)]
+
+	def flat(self):
+		return [wall for row in self.walls for wall in row]
+
+	def set_flat(self, bit, value):
+		self.walls[bit // self.length][bit % self.length] = value
+
+class WallPlaneTest(unittest.TestCase):
+
+	shapes = ((1, 1), (3, 2), (5, 4), (9, 8), (17, 16), (21, 13))
+
+	def assertSame(self, plane, reference):
+		self.assertEqual([plane.get_bit(bit) for bit in
+						  range(plane.rows * plane.length)], reference.flat())
+		self.assertEqual([list(plane[row]) for row in range(plane.rows)],
+						 reference.walls)
+
+	def test_starting_value(self):
+		for rows, length in self.shapes:
+			for value in (False, True):
+				self.assertSame(WallPlane(rows, length, value),
+								ReferencePlane(rows, length, value))
+
+	def test_random_operations(self):
+		random = Random(1)
+		for rows, length in self.shapes:
+			plane = WallPlane(rows, length)
+			# Small chunks make set_range split its whole bytes.
+			plane.fill_chunk = random.choice((1, 3, WallPlane.fill_chunk))
+			reference = ReferencePlane(rows, length)
+			total = rows * length
+
+			for step in range(300):
+				kind = random.randrange(5)
+				value = random.random() < 0.5
+				if kind == 0:
+					row, index = random.randrange(rows), random.randrange(length)
+					plane[row][index] = value
+					reference.walls[row][index] = value
+				elif kind == 1:
+					row, index = random.randrange(rows), random.randrange(length)
+					plane.set(row, index, value)
+					reference.walls[row][index] = value
+				elif kind == 2:
+					start = random.randrange(total)
+					stop = random.randrange(start, total + 1)
+					plane.set_range(start, stop, value)
+					for bit in range(start, stop):
+						reference.set_flat(bit, value)
+				elif kind == 3:
+					start = random.randrange(total)
+					count = random.randrange(total - start + 1)
+					bits = random.getrandbits(count) if count else 0
+					plane.write_bits(start, count, bits)
+					for i in range(count):
+						reference.set_flat(start + i, bool(bits >> i & 1))
+				else:
+					row = random.randrange(rows)
+					plane.fill_row(row, value)
+					reference.walls[row] = [value] * length
+
+				self.assertSame(plane, reference)
+
+	def test_read_bits(self):
+		random = Random(2)
+		for rows, length in self.shapes:
+			plane = WallPlane(rows, length)
+			reference = ReferencePlane(rows, length)
+			total = rows * length
+			for bit in range(total):
+				value = random.random() < 0.5
+				plane.set_bit(bit, value)
+				reference.set_flat(bit, value)
+
+			flat = reference.flat()
+			for start in range(total):
+				for count in range(total - start + 1):
+					expected = sum(1 << i for i in range(count)
+								   if flat[start + i])
+					self.assertEqual(plane.read_bits(start, count), expected)
+
+	def test_row_bounds(self):
+		plane = WallPlane(3, 4)
+		with self.assertRaises(IndexError):
+			plane[3]
+		with self.assertRaises(IndexError):
+			plane[0][4]
+		with self.assertRaises(IndexError):
+			plane[0][-5] = True
+		self.assertEqual(plane[-1].row, 2)
+
+	def test_row_assignment_length(self):
+		plane = WallPlane(3, 4)
+		for values in ([True] * 6, [True] * 3, []):
+			with self.assertRaises(ValueError):
+				plane[0] = values
+		self.assertFalse(any(plane.get_bit(bit) for bit in range(12)))
+		plane[0] = (value for value in [True, False, True, False])
+		self.assertEqual(list(plane[0]), [True, False, True, False])
+
+class MazeAccessTest(unittest.TestCase):
+
+	def test_cell_bounds(self):
+		maze = Maze(4)
+		for x, y in ((4, 0), (0, 4), (-1, 0), (0, -1)):
+			with self.assertRaises(IndexError):
+				maze[x, y]
+			with self.assertRaises(IndexError):
+				maze[x, y, 'N'] = True
+		self.assertFalse(maze.slabs[1][0])
+
+	def test_walls_match_planes(self):
+		maze = Maze(4)
+		maze[1, 2, 'N'] = True
+		maze[3, 0, 'E'] = False
+		self.assertTrue(maze.slabs[2][1])
+		self.assertFalse(maze.columns[4][0])
+		self.assertEqual(maze[1, 2], {'N': True, 'S': False,
+									  'W': False, 'E': False})
+		self.assertEqual(maze[3, 0], {'N': True, 'S': False,
+									  'W': False, 'E': False})
+
+if __name__ == '__main__':
+	unittest.main()